@@ -13,12 +13,23 @@ import scripts.spritesheet_loader as spritesheet_loader
 import scripts.tile_map as tile_map
 import scripts.anim_loader as anim_loader
 import scripts.particles as particles_m
+from scripts.projectiles import ProjectileManager
 from scripts.entity import Entity
 import scripts.text as text
 from scripts.clip import clip
+from scripts.light_buffer import LightBuffer
+import scripts.atlas as atlas
+from scripts.emitters import EmitterSystem
 
 TILE_SIZE = 12
 
+# 'blit' adds every glow straight onto the display, 'buffer' accumulates them in a LightBuffer
+# and composites them wherever something is about to be drawn over them (before each tile layer,
+# after the tiles, the soul and the door glow), so both modes give the same frame
+# (NETGUARDIAN_LIGHT_SCALE=2 runs the buffer at half resolution and only approximates it)
+LIGHTING_MODE = os.environ.get('NETGUARDIAN_LIGHTING', 'blit')
+LIGHT_SCALE = int(os.environ.get('NETGUARDIAN_LIGHT_SCALE', '1'))
+
 # Try to initialize audio, if fails use dummy driver
 audio_enabled = True
 try:
@@ -39,6 +50,19 @@ pygame.mouse.set_visible(True)
 display = pygame.Surface((300, 200))
 clock = pygame.time.Clock()
 
+light_buffer = LightBuffer(display.get_size(), LIGHT_SCALE) if LIGHTING_MODE == 'buffer' else None
+
+def add_glow(size, color, loc):
+    if light_buffer:
+        light_buffer.add(size, color, loc)
+    else:
+        particles_m.blit_center_add(display, particles_m.glow_surf(size, color), loc)
+
+# lands the glows added so far, so whatever is drawn next covers them like it would in 'blit' mode
+def flush_glows():
+    if light_buffer:
+        light_buffer.composite(display)
+
 # ============= COLORES CIBERSEGURIDAD =============
 CYBER_COLORS = {
     'primary_green': (0, 255, 100),
@@ -241,6 +265,9 @@ class GameHistory:
     def add_threat_neutralized(self):
         self.current_session['threats_neutralized'] += 1
     
+    def add_threats_neutralized(self, count):
+        self.current_session['threats_neutralized'] += count
+    
     def add_firewall_collected(self):
         self.current_session['firewalls_collected'] += 1
     
@@ -271,7 +298,7 @@ class Button:
         text_width = self.font.width(self.text)
         text_x = self.rect.centerx - text_width // 2
         text_y = self.rect.centery - 4
-        self.font.render(self.text, surface, (text_x, text_y))
+        self.font.render_cached(self.text, surface, (text_x, text_y))
     
     def check_hover(self, mouse_pos):
         scaled_pos = (mouse_pos[0] * display.get_width() // screen.get_width(),
@@ -301,7 +328,7 @@ class VolumeControl:
     
     def draw(self, surface):
         volume_text = f'{int(self.volume * 100)}'
-        self.font.render(volume_text, surface, (self.x, self.y + 5))
+        self.font.render_cached(volume_text, surface, (self.x, self.y + 5))
         self.plus_button.draw(surface)
         self.minus_button.draw(surface)
     
@@ -360,7 +387,7 @@ class InputBox:
         display_text = self.text if self.text else 'Usuario...'
         text_color = CYBER_COLORS['primary_green'] if self.text else (100, 100, 100)
         
-        temp_font = text.Font('data/fonts/small_font.png', text_color)
+        temp_font = text.get_font('data/fonts/small_font.png', text_color)
         temp_font.render(display_text, surface, (self.rect.x + 5, self.rect.y + 5))
         
         if self.active and game_time % 30 < 15:
@@ -425,18 +452,18 @@ class GameMenu:
         
         glitch_offset = random.randint(-1, 1) if game_time % 60 < 2 else 0
         
-        black_font = text.Font('data/fonts/small_font.png', (0, 0, 1))
-        cyan_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-        green_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+        black_font = text.get_font('data/fonts/small_font.png', (0, 0, 1))
+        cyan_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+        green_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
         
-        black_font.render(title, self.display, (title_x + 1, 31))
-        cyan_font.render(title, self.display, (title_x + glitch_offset, 30))
-        green_font.render(title, self.display, (title_x, 29))
+        black_font.render_cached(title, self.display, (title_x + 1, 31))
+        cyan_font.render_cached(title, self.display, (title_x + glitch_offset, 30))
+        green_font.render_cached(title, self.display, (title_x, 29))
         
         subtitle = 'THE LAST FIREWALL'
         sub_x = self.display.get_width() // 2 - self.font.width(subtitle) // 2
-        small_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-        small_font.render(subtitle, self.display, (sub_x, 45))
+        small_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+        small_font.render_cached(subtitle, self.display, (sub_x, 45))
         
         for i in range(3):
             x = title_x + i * 60 + 10
@@ -450,8 +477,8 @@ class GameMenu:
         
         instructions = '> Flechas para navegar'
         inst_x = self.display.get_width() // 2 - self.font.width(instructions) // 2
-        inst_font = text.Font('data/fonts/small_font.png', (100, 150, 100))
-        inst_font.render(instructions, self.display, (inst_x, self.display.get_height() - 20))
+        inst_font = text.get_font('data/fonts/small_font.png', (100, 150, 100))
+        inst_font.render_cached(instructions, self.display, (inst_x, self.display.get_height() - 20))
     
     def render_firewall_icon(self, pos, offset):
         points = []
@@ -470,8 +497,8 @@ class GameMenu:
         
         prompt = 'ID DE USUARIO:'
         prompt_x = self.display.get_width() // 2 - self.font.width(prompt) // 2
-        cyan_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-        cyan_font.render(prompt, self.display, (prompt_x, 70))
+        cyan_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+        cyan_font.render_cached(prompt, self.display, (prompt_x, 70))
         
         self.name_input.draw(self.display, game_time)
         
@@ -483,8 +510,8 @@ class GameMenu:
         
         title = 'HISTORIAL DE SESIONES'
         title_x = self.display.get_width() // 2 - self.font.width(title) // 2
-        cyan_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-        cyan_font.render(title, self.display, (title_x, 10))
+        cyan_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+        cyan_font.render_cached(title, self.display, (title_x, 10))
         
         pygame.draw.line(self.display, CYBER_COLORS['primary_cyan'], 
                         (10, 25), (self.display.get_width() - 10, 25), 1)
@@ -492,8 +519,8 @@ class GameMenu:
         if not self.history.history:
             no_data = 'SIN REGISTROS'
             no_data_x = self.display.get_width() // 2 - self.font.width(no_data) // 2
-            green_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-            green_font.render(no_data, self.display, (no_data_x, 100))
+            green_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+            green_font.render_cached(no_data, self.display, (no_data_x, 100))
         else:
             y_offset = 35
             visible_history = self.history.history[self.history_scroll:
@@ -511,22 +538,22 @@ class GameMenu:
                 threats = session.get('threats_neutralized', session.get('enemies_defeated', 0))
                 threats = str(threats)
                 
-                data_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+                data_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
                 
-                data_font.render(f'{player_name}', self.display, (10, y_offset))
-                data_font.render(f'{duration}', self.display, (100, y_offset))
-                data_font.render(f'T:{threats}', self.display, (170, y_offset))
+                data_font.render_cached(f'{player_name}', self.display, (10, y_offset))
+                data_font.render_cached(f'{duration}', self.display, (100, y_offset))
+                data_font.render_cached(f'T:{threats}', self.display, (170, y_offset))
                 
-                date_font = text.Font('data/fonts/small_font.png', (80, 120, 120))
-                date_font.render(session['date'][11:16], self.display, (220, y_offset))
+                date_font = text.get_font('data/fonts/small_font.png', (80, 120, 120))
+                date_font.render_cached(session['date'][11:16], self.display, (220, y_offset))
                 
                 y_offset += 18
             
             if len(self.history.history) > self.max_history_display:
                 scroll_text = f'{self.history_scroll + 1}-{min(self.history_scroll + self.max_history_display, len(self.history.history))} / {len(self.history.history)}'
                 scroll_x = self.display.get_width() // 2 - self.font.width(scroll_text) // 2
-                small_font = text.Font('data/fonts/small_font.png', (80, 100, 100))
-                small_font.render(scroll_text, self.display, (scroll_x, y_offset + 5))
+                small_font = text.get_font('data/fonts/small_font.png', (80, 100, 100))
+                small_font.render_cached(scroll_text, self.display, (scroll_x, y_offset + 5))
         
         self.back_button.draw(self.display)
     
@@ -538,22 +565,22 @@ class GameMenu:
             if line == '':
                 y_offset += 8
             elif line.startswith('ANO') or line.startswith('TU MISION') or line.startswith('HERRAMIENTAS'):
-                cyan_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+                cyan_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
                 line_x = self.display.get_width() // 2 - self.font.width(line) // 2
-                cyan_font.render(line, self.display, (line_x, y_offset))
+                cyan_font.render_cached(line, self.display, (line_x, y_offset))
                 y_offset += 12
             elif line.startswith('['):
-                green_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+                green_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
                 line_x = self.display.get_width() // 2 - self.font.width(line) // 2
                 glow = abs(math.sin(game_time * 0.1)) * 20
                 glow_color = (0, int(255 - glow), int(100 + glow))
-                glow_font = text.Font('data/fonts/small_font.png', glow_color)
-                glow_font.render(line, self.display, (line_x, y_offset))
+                glow_font = text.get_font('data/fonts/small_font.png', glow_color)
+                glow_font.render_cached(line, self.display, (line_x, y_offset))
                 y_offset += 12
             else:
-                white_font = text.Font('data/fonts/small_font.png', (200, 200, 200))
+                white_font = text.get_font('data/fonts/small_font.png', (200, 200, 200))
                 line_x = self.display.get_width() // 2 - self.font.width(line) // 2
-                white_font.render(line, self.display, (line_x, y_offset))
+                white_font.render_cached(line, self.display, (line_x, y_offset))
                 y_offset += 10
     
     def update(self, game_time, events, mouse_pos, mouse_pressed):
@@ -987,29 +1014,29 @@ class FirewallRuleStack:
         pygame.draw.rect(surface, CYBER_COLORS['primary_cyan'], 
                         (pos[0], pos[1], 75, panel_height), 1)
         
-        font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-        font.render('FIREWALL:', surface, (pos[0] + 2, pos[1] + 2))
+        font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+        font.render_cached('FIREWALL:', surface, (pos[0] + 2, pos[1] + 2))
         
         if self.is_empty():
-            font.render('(Vacio)', surface, (pos[0] + 2, pos[1] + 12))
+            font.render_cached('(Vacio)', surface, (pos[0] + 2, pos[1] + 12))
         else:
             for i, rule in enumerate(reversed(self.stack)):
                 y_pos = pos[1] + 12 + i * 8
                 is_top = (i == 0)
                 color = CYBER_COLORS['warning'] if is_top and game_time % 40 < 20 else CYBER_COLORS['primary_cyan']
-                font.render(rule[:10], surface, (pos[0] + 2, y_pos))
+                font.render_cached(rule[:10], surface, (pos[0] + 2, y_pos))
         
         help_y = pos[1] + panel_height - 16
-        help_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-        help_font.render('[1-5]Add', surface, (pos[0] + 2, help_y))
-        help_font.render('[U]Undo', surface, (pos[0] + 2, help_y + 8))
+        help_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+        help_font.render_cached('[1-5]Add', surface, (pos[0] + 2, help_y))
+        help_font.render_cached('[U]Undo', surface, (pos[0] + 2, help_y + 8))
     
     def render_message(self, surface):
         if self.message_timer > 0:
-            font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+            font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
             msg_x = surface.get_width() // 2 - len(self.message) * 2
             msg_y = surface.get_height() - 30
-            font.render(self.message, surface, (msg_x, msg_y))
+            font.render_cached(self.message, surface, (msg_x, msg_y))
 
 
 # ============= SISTEMA IDS (INTRUSION DETECTION SYSTEM) =============
@@ -1067,14 +1094,14 @@ class IntrusionDetectionSystem:
         pygame.draw.rect(surface, CYBER_COLORS['primary_cyan'], 
                         (pos[0], pos[1], bar_width, bar_height), 1)
         
-        ids_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-        ids_font.render('IDS', surface, (pos[0], pos[1] - 8))
+        ids_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+        ids_font.render_cached('IDS', surface, (pos[0], pos[1] - 8))
         
         y_offset = 0
         for alert in self.alerts:
             if alert['timer'] > 0:
-                alert_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['warning'])
-                alert_font.render(alert['text'], surface, (pos[0], pos[1] + 10 + y_offset))
+                alert_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['warning'])
+                alert_font.render_cached(alert['text'], surface, (pos[0], pos[1] + 10 + y_offset))
                 alert['timer'] -= 1
                 y_offset += 8
 
@@ -1233,13 +1260,13 @@ class PacketFilteringGame:
         
         pygame.draw.rect(surface, (10, 20, 35), (ui_x + 2, ui_y + 2, panel_width - 4, 15))
         
-        title_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-        title_font.render('FILTRO DE PAQUETES', surface, (ui_x + 8, ui_y + 5))
+        title_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+        title_font.render_cached('FILTRO DE PAQUETES', surface, (ui_x + 8, ui_y + 5))
         
         score_y = ui_y + 22
-        score_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+        score_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
         score_text = f"SCORE: {self.score}/{self.required_score}"
-        score_font.render(score_text, surface, (ui_x + 5, score_y))
+        score_font.render_cached(score_text, surface, (ui_x + 5, score_y))
         
         bar_y = ui_y + 35
         bar_width = panel_width - 10
@@ -1252,18 +1279,18 @@ class PacketFilteringGame:
         pygame.draw.rect(surface, CYBER_COLORS['primary_cyan'], (ui_x + 5, bar_y, bar_width, bar_height), 1)
         
         queue_y = ui_y + 47
-        queue_label = text.Font('data/fonts/small_font.png', (180, 180, 200))
+        queue_label = text.get_font('data/fonts/small_font.png', (180, 180, 200))
         queue_label.render("COLA:", surface, (ui_x + 5, queue_y))
         
         for i, packet in enumerate(self.packet_queue.queue[:3]):
             color = CYBER_COLORS['danger'] if packet['is_threat'] else CYBER_COLORS['safe']
-            packet_font = text.Font('data/fonts/small_font.png', color)
+            packet_font = text.get_font('data/fonts/small_font.png', color)
             packet_text = f"{packet['type'][:7]}"
-            packet_font.render(packet_text, surface, (ui_x + 40, queue_y + i * 8))
+            packet_font.render_cached(packet_text, surface, (ui_x + 40, queue_y + i * 8))
         
-        hint_font = text.Font('data/fonts/small_font.png', (150, 170, 150))
-        hint_font.render("F:BLOQUEAR", surface, (ui_x + 5, ui_y + panel_height - 18))
-        hint_font.render("G:PERMITIR", surface, (ui_x + 5, ui_y + panel_height - 10))
+        hint_font = text.get_font('data/fonts/small_font.png', (150, 170, 150))
+        hint_font.render_cached("F:BLOQUEAR", surface, (ui_x + 5, ui_y + panel_height - 18))
+        hint_font.render_cached("G:PERMITIR", surface, (ui_x + 5, ui_y + panel_height - 10))
 
 
 # ============= FUNCIONES DE RENDERIZADO CYBER =============
@@ -1287,9 +1314,7 @@ def render_firewall(loc, size=[2, 3], color1=None, color2=None):
     pygame.draw.circle(display, color2, (int(loc[0]), int(loc[1])), 2, 1)
 
 
-def render_threat_warning(projectile, scroll, game_time):
-    pos = [projectile[0][0] - scroll[0], projectile[0][1] - scroll[1]]
-    
+def render_threat_warning(pos, game_time):
     size = 4
     warning_points = [
         [pos[0], pos[1] - size],
@@ -1378,8 +1403,8 @@ def render_cyber_hud(player_firewall, level_time):
     pygame.draw.line(display, hud_color, (0, 15), (display.get_width(), 15), 1)
     
     time_text = f"TIEMPO: {level_time // 60}s"
-    time_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-    time_font.render(time_text, display, (display.get_width() - 80, 5))
+    time_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+    time_font.render_cached(time_text, display, (display.get_width() - 80, 5))
     
     firewall_bar_width = 50
     firewall_bar_height = 6
@@ -1400,7 +1425,20 @@ def render_cyber_hud(player_firewall, level_time):
 
 # ============= JUEGO ORIGINAL CON TEMA CYBER =============
 spritesheets, spritesheets_data = spritesheet_loader.load_spritesheets('data/images/tilesets/')
-level_map = tile_map.TileMap((TILE_SIZE, TILE_SIZE), (300, 200))
+level_map = tile_map.TileMap((TILE_SIZE, TILE_SIZE), (300, 200), spritesheets, spritesheets_data)
+TORCH_GLOWS = [(15, 8.5, 4, 0.5, 8, 0.9), (9, 4, 8, 0.5, 12, 0.9)]
+# at 60 fps a torch rolls about 10 particles a second and is held to 15, the big decoration rolls 30
+# and is held to 36; at higher frame rates the budget keeps them there instead of scaling with fps
+EMITTER_SPECS = {
+    'torches': {'offset': (6, 4), 'glows': TORCH_GLOWS, 'after_tiles': False, 'spawn_chance': 6, 'spawn_offsets': None,
+                'particle': 'light', 'start_frame': 3, 'color': CYBER_COLORS['primary_cyan'], 'budget': 3, 'refill': 0.25},
+    ('decorations', 0): {'offset': (TILE_SIZE, TILE_SIZE * 1.5), 'glows': [(15, 8.5, 4, 0.7, 8, 1.3), (9, 4, 8, 0.7, 12, 1.3)], 'after_tiles': False,
+                         'spawn_chance': 2, 'spawn_offsets': [[-8, 1], [8, 1], [4, 4], [-4, 4]],
+                         'particle': 'light', 'start_frame': 4, 'color': CYBER_COLORS['primary_cyan'], 'budget': 3, 'refill': 0.6},
+    'mana': {'offset': (6, 4), 'glows': TORCH_GLOWS, 'after_tiles': True, 'spawn_chance': 0, 'spawn_offsets': None,
+             'particle': None, 'start_frame': 0, 'color': None, 'budget': 0, 'refill': 0},
+}
+emitters = EmitterSystem(level_map, EMITTER_SPECS)
 level_name = 'level_1'
 
 level_spawns = {
@@ -1626,8 +1664,8 @@ def reload_level(restart_audio=True):
         tutorial = 0
         tutorial_2 = -1
 
-    projectiles = []
-    particles = []
+    projectiles.clear()
+    particles.clear()
 
     if level_name != 'level_1':
         door = None
@@ -1649,26 +1687,26 @@ def particle_burst(loc, amt):
         angle = random.randint(1, 360)
         speed = random.randint(20, 80) / 10
         vel = [math.cos(angle) * speed, math.sin(angle) * speed]
-        particles.append(particles_m.Particle(loc[0], loc[1], 'light', vel, 0.8, 2 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_cyan']))
+        particles.add(loc[0], loc[1], 'light', vel, 0.8, 2 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_cyan'])
 
 animations = anim_loader.AnimationManager()
 
-proj_img = pygame.image.load('data/images/projectile.png').convert()
+proj_img = atlas.load_image('data/images/projectile.png')
 proj_img.set_colorkey((0, 0, 0))
-door_img = pygame.image.load('data/images/door.png').convert()
+door_img = atlas.load_image('data/images/door.png')
 door_img.set_colorkey((0, 0, 0))
 
-projectiles = []
+projectiles = ProjectileManager()
 
-particles_m.load_particle_images('data/images/particles')
-particles = []
+particles_m.load_particle_images('data/images/particles', CYBER_COLORS.values())
+particles = particles_m.ParticleSystem()
 
-sparks = []
+sparks = particles_m.Sparks()
 
-font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-blue_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-red_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['danger'])
-black_font = text.Font('data/fonts/small_font.png', (0, 0, 1))
+font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+blue_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+red_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['danger'])
+black_font = text.get_font('data/fonts/small_font.png', (0, 0, 1))
 
 player = Entity(animations, level_spawns[level_name], (7, 13), 'player')
 soul = Entity(animations, level_spawns[level_name], (7, 13), 'soul')
@@ -1752,22 +1790,22 @@ def render_level_objectives(current_level, game_time):
     display.blit(overlay, (0, 0))
     
     # Título del sector
-    title_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+    title_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
     title_x = display.get_width() // 2 - font.width(obj_data['title']) // 2
-    title_font.render(obj_data['title'], display, (title_x, 20))
+    title_font.render_cached(obj_data['title'], display, (title_x, 20))
     
     pygame.draw.line(display, CYBER_COLORS['primary_cyan'], 
                     (20, 35), (display.get_width() - 20, 35), 1)
     
     # Objetivos
     y_offset = 45
-    obj_label_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-    obj_label_font.render('OBJETIVOS:', display, (25, y_offset))
+    obj_label_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+    obj_label_font.render_cached('OBJETIVOS:', display, (25, y_offset))
     y_offset += 15
     
-    white_font = text.Font('data/fonts/small_font.png', (200, 200, 200))
+    white_font = text.get_font('data/fonts/small_font.png', (200, 200, 200))
     for objective in obj_data['objectives']:
-        white_font.render(objective, display, (30, y_offset))
+        white_font.render_cached(objective, display, (30, y_offset))
         y_offset += 11
     
     # Concepto educativo
@@ -1777,18 +1815,18 @@ def render_level_objectives(current_level, game_time):
     y_offset += 8
     
     concept_lines = obj_data['concept'].split('\n')
-    yellow_font = text.Font('data/fonts/small_font.png', (255, 220, 100))
+    yellow_font = text.get_font('data/fonts/small_font.png', (255, 220, 100))
     for line in concept_lines:
-        yellow_font.render(line, display, (25, y_offset))
+        yellow_font.render_cached(line, display, (25, y_offset))
         y_offset += 10
     
     # Instrucción para continuar
     glow = abs(math.sin(game_time * 0.1)) * 20
     glow_color = (0, int(255 - glow), int(100 + glow))
-    continue_font = text.Font('data/fonts/small_font.png', glow_color)
+    continue_font = text.get_font('data/fonts/small_font.png', glow_color)
     continue_text = '[Presiona ESPACIO para iniciar]'
     continue_x = display.get_width() // 2 - font.width(continue_text) // 2
-    continue_font.render(continue_text, display, (continue_x, display.get_height() - 20))
+    continue_font.render_cached(continue_text, display, (continue_x, display.get_height() - 20))
 
 while True:
     # MENÚ
@@ -1837,26 +1875,26 @@ while True:
             if line == '':
                 y_offset += 6
             elif line.startswith('MISION') or line.startswith('ANO') or line.startswith('SECTORES') or line.startswith('FIN'):
-                cyan_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+                cyan_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
                 line_x = display.get_width() // 2 - font.width(line) // 2
-                cyan_font.render(line, display, (line_x, y_offset))
+                cyan_font.render_cached(line, display, (line_x, y_offset))
                 y_offset += 12
             elif line.startswith('['):
-                green_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+                green_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
                 line_x = display.get_width() // 2 - font.width(line) // 2
                 glow = abs(math.sin(game_time * 0.1)) * 20
                 glow_color = (0, int(255 - glow), int(100 + glow))
-                glow_font = text.Font('data/fonts/small_font.png', glow_color)
-                glow_font.render(line, display, (line_x, y_offset))
+                glow_font = text.get_font('data/fonts/small_font.png', glow_color)
+                glow_font.render_cached(line, display, (line_x, y_offset))
                 y_offset += 12
             elif line.startswith('1.') or line.startswith('2.') or line.startswith('3.') or line.startswith('4.'):
-                green_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
-                green_font.render(line, display, (30, y_offset))
+                green_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_green'])
+                green_font.render_cached(line, display, (30, y_offset))
                 y_offset += 9
             else:
-                white_font = text.Font('data/fonts/small_font.png', (200, 200, 200))
+                white_font = text.get_font('data/fonts/small_font.png', (200, 200, 200))
                 line_x = display.get_width() // 2 - font.width(line) // 2
-                white_font.render(line, display, (line_x, y_offset))
+                white_font.render_cached(line, display, (line_x, y_offset))
                 y_offset += 9
         
         for event in pygame.event.get():
@@ -1971,11 +2009,11 @@ while True:
             pygame.draw.rect(display, (60, 20, 20), (pos[0], pos[1], 12, 18))
             pygame.draw.rect(display, CYBER_COLORS['danger'], (pos[0], pos[1], 12, 18), 2)
             if game_time % 60 < 30:
-                font.render('PUERTO BLOQ', display, (pos[0] - 25, pos[1] - 15))
+                font.render_cached('PUERTO BLOQ', display, (pos[0] - 25, pos[1] - 15))
         
         if random.randint(1, 7) == 1:
             color = CYBER_COLORS['safe'] if door_unlocked else CYBER_COLORS['danger']
-            particles.append(particles_m.Particle(door[0] + 6, door[1] + 9, 'light', [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 - 2], 0.1, 3.5 + random.randint(0, 20) / 10, custom_color=color))
+            particles.add(door[0] + 6, door[1] + 9, 'light', [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 - 2], 0.1, 3.5 + random.randint(0, 20) / 10, custom_color=color)
         
         if player.get_distance([door[0] + 6, door[1] + 9]) < 5:
             if door_unlocked:
@@ -1999,69 +2037,49 @@ while True:
                         player_message = [120, 'Terminal de acceso bloqueada!', '']
 
     # render tiles
-    render_list = level_map.get_visible(scroll)
-    collideables = []
-    for layer in render_list:
+    emitters.update(scroll, game_time, particles, dt)
+    pickup_list = level_map.get_visible_records(scroll, tile_map.PICKUP)
+    collideables = level_map
+    for layer_id, layer in zip(level_map.all_layers, pickup_list):
+        for glow in emitters.get_glows(layer_id):
+            add_glow(*glow)
+        flush_glows()
+        level_map.render_layer(display, scroll, layer_id)
         for tile in layer:
-            offset = [0, 0]
-            if tile[1][0] in spritesheets_data:
-                tile_id = str(tile[1][1]) + ';' + str(tile[1][2])
-                if tile_id in spritesheets_data[tile[1][0]]:
-                    if 'tile_offset' in spritesheets_data[tile[1][0]][tile_id]:
-                        offset = spritesheets_data[tile[1][0]][tile_id]['tile_offset']
-            if tile[1][0] == 'ground':
-                collideables.append(pygame.Rect(tile[0][0], tile[0][1], TILE_SIZE, TILE_SIZE))
-            if tile[1][0] == 'torches':
-                if random.randint(1, 6) == 1:
-                    particles.append(particles_m.Particle(tile[0][0] + 6, tile[0][1] + 4, 'light', [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 - 2], 0.1, 3 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_cyan']))
-                torch_sin = math.sin((tile[0][1] % 100 + 200) / 300 * game_time * 0.01)
-                particles_m.blit_center_add(display, particles_m.circle_surf(15 + (torch_sin + 3) * 8.5, (0, 4 + (torch_sin + 4) * 0.5, 8 + (torch_sin + 4) * 0.9)), (tile[0][0] - scroll[0] + 6, tile[0][1] - scroll[1] + 4))
-                particles_m.blit_center_add(display, particles_m.circle_surf(9 + (torch_sin + 3) * 4, (0, 8 + (torch_sin + 4) * 0.5, 12 + (torch_sin + 4) * 0.9)), (tile[0][0] - scroll[0] + 6, tile[0][1] - scroll[1] + 4))
-            if (tile[1][0] == 'decorations') and (tile[1][1] == 0):
-                if random.randint(1, 2) == 1:
-                    p_offset = random.choice([[-8, 1], [8, 1], [4, 4], [-4, 4]])
-                    particles.append(particles_m.Particle(tile[0][0] + TILE_SIZE + p_offset[0], tile[0][1] + TILE_SIZE * 1.5 + p_offset[1], 'light', [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 - 2], 0.1, 4 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_cyan']))
-                torch_sin = math.sin((tile[0][1] % 100 + 200) / 300 * game_time * 0.01)
-                particles_m.blit_center_add(display, particles_m.circle_surf(15 + (torch_sin + 3) * 8.5, (0, 4 + (torch_sin + 4) * 0.7, 8 + (torch_sin + 4) * 1.3)), (tile[0][0] - scroll[0] + TILE_SIZE, tile[0][1] - scroll[1] + TILE_SIZE * 1.5))
-                particles_m.blit_center_add(display, particles_m.circle_surf(9 + (torch_sin + 3) * 4, (0, 8 + (torch_sin + 4) * 0.7, 12 + (torch_sin + 4) * 1.3)), (tile[0][0] - scroll[0] + TILE_SIZE, tile[0][1] - scroll[1]  + TILE_SIZE * 1.5))
-            if tile[1][0] != 'mana':
-                img = spritesheet_loader.get_img(spritesheets, tile[1])
-                display.blit(img, (math.floor(tile[0][0] - scroll[0] + offset[0]), math.floor(tile[0][1] - scroll[1] + offset[1])))
-            else:
-                render_firewall([tile[0][0] + 6 - scroll[0], tile[0][1] + 6 - scroll[1]])
-                torch_sin = math.sin((tile[0][1] % 100 + 200) / 300 * game_time * 0.01)
-                particles_m.blit_center_add(display, particles_m.circle_surf(15 + (torch_sin + 3) * 8.5, (0, 4 + (torch_sin + 4) * 0.5, 8 + (torch_sin + 4) * 0.9)), (tile[0][0] - scroll[0] + 6, tile[0][1] - scroll[1] + 4))
-                particles_m.blit_center_add(display, particles_m.circle_surf(9 + (torch_sin + 3) * 4, (0, 8 + (torch_sin + 4) * 0.5, 12 + (torch_sin + 4) * 0.9)), (tile[0][0] - scroll[0] + 6, tile[0][1] - scroll[1] + 4))
+            render_firewall([tile[0][0] + 6 - scroll[0], tile[0][1] + 6 - scroll[1]])
+        for glow in emitters.get_glows(layer_id, True):
+            add_glow(*glow)
+    flush_glows()
     
     # Renderizar NPCs y Puzzles
     for npc in npcs:
         npc.render(display, scroll, game_time)
         if npc.can_interact(player.pos) and not npc.talked:
             screen_pos = [npc.pos[0] - scroll[0], npc.pos[1] - scroll[1]]
-            font.render('[E]', display, (screen_pos[0] - 8, screen_pos[1] - 25))
+            font.render_cached('[E]', display, (screen_pos[0] - 8, screen_pos[1] - 25))
     
     if current_puzzle:
         current_puzzle.update()
         current_puzzle.render(display, scroll, game_time)
         if current_puzzle.can_activate(player.pos) and not current_puzzle.solved:
             screen_pos = [current_puzzle.pos[0] - scroll[0], current_puzzle.pos[1] - scroll[1]]
-            font.render('[E] Acceder', display, (screen_pos[0] - 20, screen_pos[1] - 25))
+            font.render_cached('[E] Acceder', display, (screen_pos[0] - 20, screen_pos[1] - 25))
         
         if current_puzzle.message_timer > 0:
             msg_y = display.get_height() // 2 + 40
             if current_puzzle.solved:
-                blue_font.render(current_puzzle.message, display, 
-                               (display.get_width() // 2 - font.width(current_puzzle.message) // 2, msg_y))
+                blue_font.render_cached(current_puzzle.message, display, 
+                                      (display.get_width() // 2 - font.width(current_puzzle.message) // 2, msg_y))
             else:
-                red_font.render(current_puzzle.message, display,
-                              (display.get_width() // 2 - font.width(current_puzzle.message) // 2, msg_y))
+                red_font.render_cached(current_puzzle.message, display,
+                                     (display.get_width() // 2 - font.width(current_puzzle.message) // 2, msg_y))
     
     if current_packet_game:
         current_packet_game.update(dt)
         current_packet_game.render(display, scroll, game_time)
         if current_packet_game.can_activate(player.pos) and not current_packet_game.completed:
             screen_pos = [current_packet_game.pos[0] - scroll[0], current_packet_game.pos[1] - scroll[1]]
-            font.render('[E] Filtrado', display, (screen_pos[0] - 20, screen_pos[1] - 25))
+            font.render_cached('[E] Filtrado', display, (screen_pos[0] - 20, screen_pos[1] - 25))
         current_packet_game.render_ui(display)
     
     ids_system.update(dt)
@@ -2161,10 +2179,11 @@ while True:
         if soul.pos[1] > scroll[1] + display.get_height():
             soul.pos[1] = scroll[1] + display.get_height()
         if random.randint(1, 3) == 1:
-            particles.append(particles_m.Particle(soul.pos[0] + 3, soul.pos[1] + 4, 'light', [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 + 1], 0.2, 3 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_cyan']))
+            particles.add(soul.pos[0] + 3, soul.pos[1] + 4, 'light', [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 + 1], 0.2, 3 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_cyan'])
         torch_sin = math.sin((soul.center[1] % 100 + 200) / 300 * game_time * 0.1)
-        particles_m.blit_center_add(display, particles_m.circle_surf(7 + (torch_sin + 3) * 3, (0, 4 + (torch_sin + 4) * 0.5, 18 + (torch_sin + 4) * 0.9)), (soul.center[0] - 1 - scroll[0], soul.center[1] - 4 - scroll[1]))
-        particles_m.blit_center_add(display, particles_m.circle_surf(5 + (torch_sin + 3) * 2, (0, 8 + (torch_sin + 4) * 0.5, 18 + (torch_sin + 4) * 0.9)), (soul.center[0] - 1 - scroll[0], soul.center[1] - 4 - scroll[1]))
+        add_glow(7 + (torch_sin + 3) * 3, (0, 4 + (torch_sin + 4) * 0.5, 18 + (torch_sin + 4) * 0.9), (soul.center[0] - 1 - scroll[0], soul.center[1] - 4 - scroll[1]))
+        add_glow(5 + (torch_sin + 3) * 2, (0, 8 + (torch_sin + 4) * 0.5, 18 + (torch_sin + 4) * 0.9), (soul.center[0] - 1 - scroll[0], soul.center[1] - 4 - scroll[1]))
+        flush_glows()
         if tutorial_2 == 0:
             tutorial_2 = 1
     else:
@@ -2172,6 +2191,7 @@ while True:
 
     if level_map.tile_collide(player.center):
         tile = level_map.tile_collide(player.center)
+        tile_pos = (int(player.center[0] // TILE_SIZE), int(player.center[1] // TILE_SIZE))
         tile_center = [player.center[0] // TILE_SIZE * TILE_SIZE + TILE_SIZE // 2, player.center[1] // TILE_SIZE * TILE_SIZE + TILE_SIZE // 2]
         rm = None
         for layer in tile:
@@ -2182,12 +2202,12 @@ while True:
                 game_history.add_firewall_collected()
                 rm = layer
                 for i in range(2):
-                    sparks.append([tile_center.copy(), math.pi / 2 + math.pi * i, 10, 6, CYBER_COLORS['primary_green']])
-                    sparks.append([tile_center.copy(), math.pi * i, 6, 3, CYBER_COLORS['primary_cyan']])
+                    sparks.add(tile_center, math.pi / 2 + math.pi * i, 10, 6, CYBER_COLORS['primary_green'])
+                    sparks.add(tile_center, math.pi * i, 6, 3, CYBER_COLORS['primary_cyan'])
                 for i in range(20):
-                    particles.append(particles_m.Particle(tile_center[0], tile_center[1], 'light', [random.randint(0, 10) / 10 - 0.5, (random.randint(0, 120) / 10 + 1) * random.choice([-1, 1])], 0.1, 2 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_green']))
-        if rm:
-            del tile[rm]
+                    particles.add(tile_center[0], tile_center[1], 'light', [random.randint(0, 10) / 10 - 0.5, (random.randint(0, 120) / 10 + 1) * random.choice([-1, 1])], 0.1, 2 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_green'])
+        if rm is not None:
+            level_map.remove_tile(tile_pos, rm)
 
     # input
     for event in pygame.event.get():
@@ -2346,8 +2366,8 @@ while True:
                 if not death and (air_timer < 5) and not soul_mode and not map_transition:
                     play_sound('jump')
                     player_velocity[1] = -5.2
-                    sparks.append([list(player.rect.bottomleft), math.pi * 0.9, 2 + random.randint(0, 10) / 10, 5, CYBER_COLORS['primary_cyan']])
-                    sparks.append([list(player.rect.bottomright), math.pi * 0.1, 2 + random.randint(0, 10) / 10, 5, CYBER_COLORS['primary_cyan']])
+                    sparks.add(player.rect.bottomleft, math.pi * 0.9, 2 + random.randint(0, 10) / 10, 5, CYBER_COLORS['primary_cyan'])
+                    sparks.add(player.rect.bottomright, math.pi * 0.1, 2 + random.randint(0, 10) / 10, 5, CYBER_COLORS['primary_cyan'])
                 up = True
         if event.type == KEYUP:
             if event.key == K_RIGHT:
@@ -2404,9 +2424,8 @@ while True:
                     vel = [-4, 0]
                     angle = math.atan2(vel[1], vel[0])
                     spawn = [display.get_width() + scroll[0], display.get_height() * i / 15 + scroll[1]]
-                    for j in range(5):
-                        sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 4 + random.randint(0, 30) / 10, 10, CYBER_COLORS['danger']])
-                    projectiles.append([spawn, vel, 'enemy'])
+                    sparks.spray(spawn, angle, 5, 4, 10, CYBER_COLORS['danger'])
+                    projectiles.add(spawn, vel)
                 play_sound('eye_shoot_large')
         if events['lv1']:
             if events['lv1'] != -1:
@@ -2446,9 +2465,8 @@ while True:
                         spawn = [display.get_width() + scroll[0], display.get_height() * i / 5 + scroll[1]]
                     else:
                         spawn = [scroll[0], display.get_height() * i / 5 + scroll[1]]
-                    for j in range(5):
-                        sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 4 + random.randint(0, 30) / 10, 10, CYBER_COLORS['danger']])
-                    projectiles.append([spawn, vel, 'enemy'])
+                    sparks.spray(spawn, angle, 5, 4, 10, CYBER_COLORS['danger'])
+                    projectiles.add(spawn, vel)
                 play_sound('eye_shoot_large')
         if (last < 3700) and (events['lv2timer'] >= 3700):
             reset = True
@@ -2472,9 +2490,8 @@ while True:
                     angle = eye_angle + random.random() * math.pi / 4 - math.pi / 8
                     vel = [math.cos(angle) * speed, math.sin(angle) * speed]
                     spawn = eye_base.copy()
-                    for j in range(3):
-                        sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 4 + random.randint(0, 30) / 10, 10, CYBER_COLORS['danger']])
-                    projectiles.append([spawn, vel, 'enemy'])
+                    sparks.spray(spawn, angle, 3, 4, 10, CYBER_COLORS['danger'])
+                    projectiles.add(spawn, vel)
         elif (1300 < events['lv3timer'] < 1800) and not puzzle_input_active:
             eye_target_height = 30
             if random.randint(0, 150) == 0:
@@ -2485,9 +2502,8 @@ while True:
                     angle = math.pi * 2 * i / 18 + offset
                     vel = [math.cos(angle) * speed, math.sin(angle) * speed]
                     spawn = eye_base.copy()
-                    for j in range(3):
-                        sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 4 + random.randint(0, 30) / 10, 10, CYBER_COLORS['danger']])
-                    projectiles.append([spawn, vel, 'enemy'])
+                    sparks.spray(spawn, angle, 3, 4, 10, CYBER_COLORS['danger'])
+                    projectiles.add(spawn, vel)
         elif (2500 < events['lv3timer'] < 3100) and not puzzle_input_active:
             eye_target_height = 38
             if game_time % 18 == 0:
@@ -2498,9 +2514,8 @@ while True:
                     angle = math.pi * 2 * i / 4 + offset
                     vel = [math.cos(angle) * speed, math.sin(angle) * speed]
                     spawn = eye_base.copy()
-                    for j in range(3):
-                        sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 7 + random.randint(0, 30) / 10, 5, CYBER_COLORS['danger']])
-                    projectiles.append([spawn, vel, 'enemy'])
+                    sparks.spray(spawn, angle, 3, 7, 5, CYBER_COLORS['danger'])
+                    projectiles.add(spawn, vel)
         elif (3600 < events['lv3timer'] < 4500) and not puzzle_input_active:
             eye_target_height = 38
             if game_time % 25 == 0:
@@ -2515,9 +2530,8 @@ while True:
                         angle = math.pi * 2 * i / 4 + offset
                         vel = [math.cos(angle) * speed, math.sin(angle) * speed]
                         spawn = eye_base.copy()
-                        for k in range(3):
-                            sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 7 + random.randint(0, 30) / 10, 5, CYBER_COLORS['danger']])
-                        projectiles.append([spawn, vel, 'enemy'])
+                        sparks.spray(spawn, angle, 3, 7, 5, CYBER_COLORS['danger'])
+                        projectiles.add(spawn, vel)
         elif (5200 < events['lv3timer'] < 5800) and not puzzle_input_active:
             eye_target_height = 30
             if game_time % 6 == 0:
@@ -2528,9 +2542,8 @@ while True:
                     angle = math.pi * 2 * i / 2 + offset
                     vel = [math.cos(angle) * speed, math.sin(angle) * speed]
                     spawn = eye_base.copy()
-                    for j in range(3):
-                        sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 7 + random.randint(0, 30) / 10, 5, CYBER_COLORS['danger']])
-                    projectiles.append([spawn, vel, 'enemy'])
+                    sparks.spray(spawn, angle, 3, 7, 5, CYBER_COLORS['danger'])
+                    projectiles.add(spawn, vel)
         else:
             eye_target_height = 4
         if (last < 1150) and (events['lv3timer'] >= 1150):
@@ -2550,13 +2563,12 @@ while True:
             play_sound('end_level')
             play_sound('death')
             ready_to_exit = True
-            for i in range(35):
-                sparks.append([eye_base.copy(), math.radians(random.randint(1, 360)), 7 + random.randint(0, 30) / 10, 8, CYBER_COLORS['primary_green']])
+            sparks.burst(eye_base, 35, 7, 8, CYBER_COLORS['primary_green'])
             for i in range(300):
                 angle = random.randint(1, 360)
                 speed = random.randint(70, 250) / 10
                 vel = [math.cos(angle) * speed, math.sin(angle) * speed]
-                particles.append(particles_m.Particle(eye_base[0], eye_base[1], 'red_light', vel, 0.2, 1.5 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_green']))
+                particles.add(eye_base[0], eye_base[1], 'red_light', vel, 0.2, 1.5 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['primary_green'])
         if (last < 1200) and (events['lv3timer'] >= 1200):
             player_message = [200, CYBER_MESSAGES['more_attacks'], '']
     
@@ -2583,43 +2595,28 @@ while True:
     else:
         r = pygame.Rect(soul.center[0] - 3, soul.center[1] - 7, 7, 7)
     
-    projectiles_removed = 0
-    for i, projectile in enumerate(projectiles):
-        if len(projectile) == 3:
-            projectile.append(random.random() + 1)
-        projectile[0][0] += projectile[1][0] * 0.2 * dt
-        projectile[0][1] += projectile[1][1] * 0.2 * dt
-        
-        if (projectile[0][0] < scroll[0] - 50 or projectile[0][0] > scroll[0] + display.get_width() + 50 or
-            projectile[0][1] < scroll[1] - 50 or projectile[0][1] > scroll[1] + display.get_height() + 50):
-            if projectile[2] == 'enemy':
-                projectiles_removed += 1
-        
-        if not map_transition:
-            if projectile[2] == 'enemy':
-                if not death:
-                    if r.collidepoint(projectile[0]):
-                        play_sound('death')
-                        death = 1
-                        soul_mode = 0
-                        scroll_target = scroll_target.copy()
-                        for j in range(30):
-                            sparks.append([list(r.center), math.radians(random.randint(1, 360)), 5 + random.randint(0, 30) / 10, 4, CYBER_COLORS['danger']])
-                        for j in range(120):
-                            angle = random.randint(1, 360)
-                            speed = random.randint(70, 250) / 10
-                            vel = [math.cos(angle) * speed, math.sin(angle) * speed]
-                            particles.append(particles_m.Particle(r.center[0], r.center[1], 'light', vel, 0.4, 2 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['danger']))
-                render_threat_warning(projectile, scroll, game_time)
-    
-    if projectiles_removed > 0:
-        for _ in range(projectiles_removed):
-            game_history.add_threat_neutralized()
+    projectiles.update(dt)
+    game_history.add_threats_neutralized(projectiles.retire_offscreen(scroll, display.get_size()))
+
+    if not map_transition:
+        if not death and projectiles.hits(r):
+            play_sound('death')
+            death = 1
+            soul_mode = 0
+            scroll_target = scroll_target.copy()
+            sparks.burst(r.center, 30, 5, 4, CYBER_COLORS['danger'])
+            for j in range(120):
+                angle = random.randint(1, 360)
+                speed = random.randint(70, 250) / 10
+                vel = [math.cos(angle) * speed, math.sin(angle) * speed]
+                particles.add(r.center[0], r.center[1], 'light', vel, 0.4, 2 + random.randint(0, 20) / 10, custom_color=CYBER_COLORS['danger'])
+        for pos in projectiles.visible(scroll, display.get_size(), 5):
+            render_threat_warning(pos, game_time)
     
     if level_name != 'level_3':
-        projectiles = projectiles[-300:]
+        projectiles.cap(300)
     else:
-        projectiles = projectiles[-500:]
+        projectiles.cap(500)
 
     if (events['lv1'] or level_name != 'level_1') and (not map_transition) and (events['lv3timer'] < 6300) and (level_name != 'level_4') and not puzzle_input_active:
         rate = 25
@@ -2631,26 +2628,13 @@ while True:
             vel = [random.randint(0, 20) / 10 - 1, 3]
             angle = math.atan2(vel[1], vel[0])
             spawn = [display.get_width() * random.random() + scroll[0], scroll[1]]
-            for i in range(5):
-                sparks.append([spawn.copy(), angle + math.radians(random.randint(0, 80) - 40), 4 + random.randint(0, 30) / 10, 6, CYBER_COLORS['danger']])
-            projectiles.append([spawn, vel, 'enemy'])
+            sparks.spray(spawn, angle, 5, 4, 6, CYBER_COLORS['danger'])
+            projectiles.add(spawn, vel)
             play_sound('eye_shoot')
 
     # sparks
-    for i, spark in sorted(enumerate(sparks), reverse=True):
-        advance(spark[0], spark[1], spark[2] * dt)
-        spark[2] -= 0.2 * dt
-        if spark[2] < 0:
-            sparks.pop(i)
-            continue
-        point_list = [
-            advance(spark[0].copy(), spark[1], spark[2] * spark[3]),
-            advance(spark[0].copy(), spark[1] + math.pi / 2, spark[2] * spark[3] * 0.1),
-            advance(spark[0].copy(), spark[1] + math.pi, spark[2] * spark[3] * 0.6),
-            advance(spark[0].copy(), spark[1] - math.pi / 2, spark[2] * spark[3] * 0.1),
-        ]
-        point_list = [[p[0] - scroll[0], p[1] - scroll[1]] for p in point_list]
-        pygame.draw.polygon(display, spark[4], point_list)
+    sparks.update(dt)
+    sparks.draw(display, scroll)
 
     # border fog
     fog_surf = pygame.Surface((display.get_width(), 24))
@@ -2668,23 +2652,19 @@ while True:
     display.blit(pygame.transform.flip(side_fog, True, False), (display.get_width() - 24 + 6, 0))
 
     # particles
-    for i, particle in sorted(enumerate(particles), reverse=True):
-        alive = particle.update(0.1 * dt)
-        particle.draw(display, scroll)
-        if particle.type == 'light' and particle.time_left > 0:
-            circle_size = max(1, 5 + particle.time_left * 0.5 * (math.sin(particle.random_constant * game_time * 0.01) + 3))
-            particles_m.blit_center_add(display, particles_m.circle_surf(circle_size, (0, 1 + particle.time_left * 0.4, 4 + particle.time_left * 0.8)), (particle.x - scroll[0], particle.y - scroll[1]))
-        if particle.type == 'red_light' and particle.time_left > 0:
-            circle_size = max(1, 5 + particle.time_left * 0.5 * (math.sin(particle.random_constant * game_time * 0.01) + 3))
-            particles_m.blit_center_add(display, particles_m.circle_surf(circle_size, (8 + particle.time_left * 0.6, 1 + particle.time_left * 0.2, 4 + particle.time_left * 0.4)), (particle.x - scroll[0], particle.y - scroll[1]))
-        if not alive:
-            particles.pop(i)
+    particles.update(0.1 * dt)
+    particles.draw(display, scroll)
+    for x, y, circle_size, color in particles.glows(game_time):
+        add_glow(circle_size, color, (x - scroll[0], y - scroll[1]))
 
     # door vfx
     if door:
-        particles_m.blit_center_add(display, particles_m.circle_surf(7 + 4 * (math.sin(game_time * 0.15) + 3), (0, 20, 12)), (door[0] + 6 - scroll[0], door[1] + 9 - scroll[1]))
+        add_glow(7 + 4 * (math.sin(game_time * 0.15) + 3), (0, 20, 12), (door[0] + 6 - scroll[0], door[1] + 9 - scroll[1]))
+        flush_glows()
         render_firewall([door[0] - scroll[0] + 6, door[1] - scroll[1] + 9], size=[2, 3], color1=(0, 50, 1), color2=CYBER_COLORS['safe'])
 
+    flush_glows()
+
     # render soul
     if soul_mode:
         soul.render(display, scroll)
@@ -2735,20 +2715,20 @@ while True:
     if tutorial < 200:
         if tutorial != 0:
             tutorial += (display.get_width() - tutorial) / 7
-        black_font.render('Arrow keys to navigate', display, (display.get_width() // 2 + tutorial - font.width('Arrow keys to navigate') // 2 + 1, display.get_height() // 2 - 10))
-        blue_font.render('Arrow keys to navigate', display, (display.get_width() // 2 + tutorial - font.width('Arrow keys to navigate') // 2, display.get_height() // 2 - 11))
-        font.render('Arrow keys to navigate', display, (display.get_width() // 2 + tutorial - font.width('Arrow keys to navigate') // 2, display.get_height() // 2 - 12))
+        black_font.render_cached('Arrow keys to navigate', display, (display.get_width() // 2 + tutorial - font.width('Arrow keys to navigate') // 2 + 1, display.get_height() // 2 - 10))
+        blue_font.render_cached('Arrow keys to navigate', display, (display.get_width() // 2 + tutorial - font.width('Arrow keys to navigate') // 2, display.get_height() // 2 - 11))
+        font.render_cached('Arrow keys to navigate', display, (display.get_width() // 2 + tutorial - font.width('Arrow keys to navigate') // 2, display.get_height() // 2 - 12))
     if tutorial_2 < 200:
         if tutorial_2 > 0:
             tutorial_2 += (display.get_width() - tutorial_2) / 7
         if tutorial_2 != -1:
-            black_font.render('Down arrow: deploy scanner', display, (display.get_width() // 2 + tutorial_2 - font.width('Down arrow: deploy scanner') // 2 + 1, display.get_height() // 2 - 10))
-            blue_font.render('Down arrow: deploy scanner', display, (display.get_width() // 2 + tutorial_2 - font.width('Down arrow: deploy scanner') // 2, display.get_height() // 2 - 11))
-            font.render('Down arrow: deploy scanner', display, (display.get_width() // 2 + tutorial_2 - font.width('Down arrow: deploy scanner') // 2, display.get_height() // 2 - 12))
+            black_font.render_cached('Down arrow: deploy scanner', display, (display.get_width() // 2 + tutorial_2 - font.width('Down arrow: deploy scanner') // 2 + 1, display.get_height() // 2 - 10))
+            blue_font.render_cached('Down arrow: deploy scanner', display, (display.get_width() // 2 + tutorial_2 - font.width('Down arrow: deploy scanner') // 2, display.get_height() // 2 - 11))
+            font.render_cached('Down arrow: deploy scanner', display, (display.get_width() // 2 + tutorial_2 - font.width('Down arrow: deploy scanner') // 2, display.get_height() // 2 - 12))
     if level_name == 'level_4':
-        black_font.render('System Secured!', display, (display.get_width() // 2 - font.width('System Secured!') // 2 + 1, display.get_height() // 2 - 10))
-        blue_font.render('System Secured!', display, (display.get_width() // 2 - font.width('System Secured!') // 2, display.get_height() // 2 - 11))
-        font.render('System Secured!', display, (display.get_width() // 2 - font.width('System Secured!') // 2, display.get_height() // 2 - 12))
+        black_font.render_cached('System Secured!', display, (display.get_width() // 2 - font.width('System Secured!') // 2 + 1, display.get_height() // 2 - 10))
+        blue_font.render_cached('System Secured!', display, (display.get_width() // 2 - font.width('System Secured!') // 2, display.get_height() // 2 - 11))
+        font.render_cached('System Secured!', display, (display.get_width() // 2 - font.width('System Secured!') // 2, display.get_height() // 2 - 12))
     
     # UI de Puzzle
     if puzzle_input_active:
@@ -2761,32 +2741,32 @@ while True:
             pygame.draw.rect(display, (5, 15, 30), (def_box_x, def_box_y, def_box_width, def_box_height))
             pygame.draw.rect(display, CYBER_COLORS['primary_cyan'], (def_box_x, def_box_y, def_box_width, def_box_height), 2)
             
-            title_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
-            title_font.render('DEFINICIONES DE AYUDA:', display, (def_box_x + 5, def_box_y + 3))
+            title_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['primary_cyan'])
+            title_font.render_cached('DEFINICIONES DE AYUDA:', display, (def_box_x + 5, def_box_y + 3))
             
             current_step = current_puzzle.current_step if hasattr(current_puzzle, 'current_step') else 0
             defs = PUZZLE_DEFINITIONS[level_name]
             
             y_offset = def_box_y + 14
-            def_font = text.Font('data/fonts/small_font.png', (180, 220, 180))
-            term_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['warning'])
+            def_font = text.get_font('data/fonts/small_font.png', (180, 220, 180))
+            term_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['warning'])
             
             for step_num, step_data in defs.items():
                 if step_num == current_step:
                     term_text = f'>{step_num+1}. {step_data["term"]}:'
-                    term_font.render(term_text, display, (def_box_x + 5, y_offset))
+                    term_font.render_cached(term_text, display, (def_box_x + 5, y_offset))
 
                     # Cálculo automático del espacio necesario para evitar cruces
                     definition_x = def_box_x + 5 + term_font.width(term_text) + 10
-                    def_font.render(step_data['definition'][:50], display, (definition_x, y_offset))
+                    def_font.render_cached(step_data['definition'][:50], display, (definition_x, y_offset))
 
                 else:
-                    dim_font = text.Font('data/fonts/small_font.png', (80, 100, 80))
-                    dim_font.render(f'{step_num+1}. {step_data["term"]}', display, (def_box_x + 5, y_offset))
+                    dim_font = text.get_font('data/fonts/small_font.png', (80, 100, 80))
+                    dim_font.render_cached(f'{step_num+1}. {step_data["term"]}', display, (def_box_x + 5, y_offset))
                 y_offset += 10
             
-            pause_font = text.Font('data/fonts/small_font.png', CYBER_COLORS['safe'])
-            pause_font.render('ATAQUES PAUSADOS', display, (def_box_x + def_box_width - 90, def_box_y + 3))
+            pause_font = text.get_font('data/fonts/small_font.png', CYBER_COLORS['safe'])
+            pause_font.render_cached('ATAQUES PAUSADOS', display, (def_box_x + def_box_width - 90, def_box_y + 3))
         
         box_width = 200
         box_height = 30
@@ -2804,7 +2784,7 @@ while True:
             pygame.draw.rect(display, CYBER_COLORS['primary_green'], (cursor_x, box_y + 10, 2, 10))
         
         hint_text = "Enter: Enviar - ESC: Cancelar"
-        font.render(hint_text, display, (display.get_width() // 2 - font.width(hint_text) // 2, box_y - 12))
+        font.render_cached(hint_text, display, (display.get_width() // 2 - font.width(hint_text) // 2, box_y - 12))
 
     # HUD
     render_cyber_hud(player_mana, level_time)
@@ -2812,12 +2792,12 @@ while True:
     no_firewall = ''
     if not player_mana:
         no_firewall = 'no '
-    black_font.render(no_firewall + 'firewall', display, (5, 6))
+    black_font.render_cached(no_firewall + 'firewall', display, (5, 6))
     if player_mana:
-        blue_font.render(no_firewall + 'firewall', display, (5, 5))
+        blue_font.render_cached(no_firewall + 'firewall', display, (5, 5))
     else:
-        red_font.render(no_firewall + 'firewall', display, (5, 5))
-    font.render(no_firewall + 'firewall', display, (5, 4))
+        red_font.render_cached(no_firewall + 'firewall', display, (5, 5))
+    font.render_cached(no_firewall + 'firewall', display, (5, 4))
 
     for i in range(player_mana):
         render_firewall([10 + i * 16, 18])
@@ -0,0 +1,11 @@
+import os
+import sys
+
+# shared bootstrap, imported first by every benchmark: headless SDL, the repo importable as
+# `scripts`, and the repo root as working directory so data/ paths resolve
+ROOT = os.path.normpath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+os.chdir(ROOT)
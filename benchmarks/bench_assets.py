@@ -0,0 +1,47 @@
+import os, sys, time, subprocess
+
+import _setup
+
+RUNS = 10
+
+# what Netguardian loads at startup, timed in a fresh process so no module caches carry over
+def load_all():
+    import pygame
+    pygame.display.set_mode((300, 200))
+    import scripts.spritesheet_loader as spritesheet_loader
+    import scripts.anim_loader as anim_loader
+    import scripts.particles as particles_m
+    import scripts.atlas as atlas
+    import scripts.text as text
+    start = time.perf_counter()
+    spritesheet_loader.load_spritesheets('data/images/tilesets/')
+    anim_loader.AnimationManager()
+    atlas.load_image('data/images/projectile.png')
+    atlas.load_image('data/images/door.png')
+    particles_m.load_particle_images('data/images/particles')
+    text.load_base_font('data/fonts/small_font.png')
+    return time.perf_counter() - start
+
+def cold(mode):
+    env = dict(os.environ, NETGUARDIAN_ATLAS=mode)
+    times = []
+    for i in range(RUNS):
+        out = subprocess.run([sys.executable, os.path.abspath(__file__), '--child'], env=env, capture_output=True, text=True).stdout
+        times.append(float(out.split()[-1]))
+    return min(times)
+
+if __name__ == '__main__':
+    if '--child' in sys.argv:
+        print(load_all())
+    else:
+        import scripts.asset_bake as asset_bake
+        import pygame
+        pygame.display.set_mode((1, 1))
+        start = time.perf_counter()
+        rebuilt = asset_bake.bake()
+        print('bake %.1f ms (%d groups rebuilt)' % ((time.perf_counter() - start) * 1000, len(rebuilt)))
+        source = cold('0')
+        print('source images           %7.2f ms' % (source * 1000))
+        for label, mode in [('baked atlas', '1'), ('baked atlas, unchecked', 'trust')]:
+            baked = cold(mode)
+            print('%-23s %7.2f ms  (%.0f%%)' % (label, baked * 1000, baked / source * 100))
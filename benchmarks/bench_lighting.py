@@ -0,0 +1,40 @@
+import math, time, random
+
+import _setup
+
+import pygame
+
+import scripts.particles as particles_m
+from scripts.light_buffer import LightBuffer
+
+# torch-like flicker: radius and color follow math.sin the way the game loop does
+def glows(count, game_time):
+    random.seed(0)
+    for i in range(count):
+        torch_sin = math.sin((game_time + i * 7) * 0.1)
+        yield (15 + (torch_sin + 3) * 8.5, (0, 4 + (torch_sin + 4) * 0.5, 8 + (torch_sin + 4) * 0.9), (random.random() * 300, random.random() * 200))
+
+def bench_blit(surf, count, frames):
+    start = time.perf_counter()
+    for frame in range(frames):
+        for size, color, loc in glows(count, frame):
+            particles_m.blit_center_add(surf, particles_m.glow_surf(size, color), loc)
+    return (time.perf_counter() - start) / frames
+
+def bench_buffer(surf, count, frames, scale):
+    light_buffer = LightBuffer(surf.get_size(), scale)
+    start = time.perf_counter()
+    for frame in range(frames):
+        for size, color, loc in glows(count, frame):
+            light_buffer.add(size, color, loc)
+        light_buffer.composite(surf)
+    return (time.perf_counter() - start) / frames
+
+if __name__ == '__main__':
+    pygame.display.set_mode((300, 200))
+    surf = pygame.Surface((300, 200)).convert()
+    for count in [50, 200, 800]:
+        blit = bench_blit(surf, count, 60)
+        full = bench_buffer(surf, count, 60, 1)
+        half = bench_buffer(surf, count, 60, 2)
+        print('%4d glows  blit %7.2f ms  buffer %7.2f ms  buffer/2 %7.2f ms' % (count, blit * 1000, full * 1000, half * 1000))
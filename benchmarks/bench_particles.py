@@ -0,0 +1,52 @@
+import time, random
+
+import _setup
+
+import pygame
+
+import scripts.particles as particles_m
+
+COLORS = [(0, 200, 255), (0, 255, 100), (255, 50, 50)]
+
+def spawn_args():
+    return (random.random() * 300, random.random() * 200, 'light', [random.random() - 0.5, random.random() - 2], 0.02, random.random() * 3, random.choice(COLORS))
+
+# keeps `live` particles alive by respawning whatever expired, like a busy level_3 frame
+def bench_objects(surf, live, frames):
+    particles = [particles_m.Particle(*spawn_args()[:6], custom_color=spawn_args()[6]) for i in range(live)]
+    start = time.perf_counter()
+    for frame in range(frames):
+        for i, particle in sorted(enumerate(particles), reverse=True):
+            alive = particle.update(0.1)
+            particle.draw(surf, (0, 0))
+            if not alive:
+                particles.pop(i)
+        while len(particles) < live:
+            args = spawn_args()
+            particles.append(particles_m.Particle(*args[:6], custom_color=args[6]))
+    return (time.perf_counter() - start) / frames
+
+def bench_system(surf, live, frames):
+    particles = particles_m.ParticleSystem()
+    for i in range(live):
+        args = spawn_args()
+        particles.add(*args[:6], custom_color=args[6])
+    start = time.perf_counter()
+    for frame in range(frames):
+        particles.update(0.1)
+        particles.draw(surf, (0, 0))
+        while len(particles) < live:
+            args = spawn_args()
+            particles.add(*args[:6], custom_color=args[6])
+    return (time.perf_counter() - start) / frames
+
+if __name__ == '__main__':
+    pygame.display.set_mode((300, 200))
+    particles_m.load_particle_images('data/images/particles')
+    surf = pygame.Surface((300, 200)).convert()
+    for live in [1000, 5000, 20000]:
+        random.seed(0)
+        obj = bench_objects(surf, live, 20 if live <= 5000 else 5)
+        random.seed(0)
+        system = bench_system(surf, live, 60)
+        print('%6d particles  Particle list %8.2f ms/frame  ParticleSystem %8.2f ms/frame' % (live, obj * 1000, system * 1000))
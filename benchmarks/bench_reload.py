@@ -0,0 +1,37 @@
+import time
+
+import _setup
+
+import pygame
+
+import scripts.tile_map as tile_map
+import scripts.map_format as map_format
+import scripts.spritesheet_loader as spritesheet_loader
+
+LEVELS = ['level_1', 'level_2', 'level_3', 'level_4']
+
+# what a death costs on the map side: load_map plus drawing the first frame at the spawn
+def respawn(level_map, surf, name, cached):
+    if not cached:
+        tile_map.map_cache.clear()
+        level_map.map_key = None
+    start = time.perf_counter()
+    level_map.load_map(name + '.json')
+    scroll = (level_map.left * 12 + 50, level_map.top * 12 + 50)
+    for layer in level_map.all_layers:
+        level_map.render_layer(surf, scroll, layer)
+    return time.perf_counter() - start
+
+if __name__ == '__main__':
+    pygame.display.set_mode((300, 200))
+    # so the loads read the .ngmap, as they do after the asset bake
+    map_format.bake()
+    surf = pygame.Surface((300, 200)).convert()
+    spritesheets, spritesheets_data = spritesheet_loader.load_spritesheets('data/images/tilesets/')
+    level_map = tile_map.TileMap((12, 12), (300, 200), spritesheets, spritesheets_data)
+    for name in LEVELS:
+        cold = min(respawn(level_map, surf, name, False) for i in range(20))
+        respawn(level_map, surf, name, True)
+        warm = min(respawn(level_map, surf, name, True) for i in range(20))
+        print('%-8s  uncached %6.2f ms  cached %6.2f ms' % (name, cold * 1000, warm * 1000))
+    print(tile_map.map_cache_info())
@@ -0,0 +1,54 @@
+import os, time, tempfile, shutil
+
+import _setup
+
+# times the marker scan itself, so the baked atlas (see scripts.atlas) must not answer instead
+os.environ['NETGUARDIAN_ATLAS'] = '0'
+
+import pygame
+
+import scripts.spritesheet_loader as spritesheet_loader
+
+RUNS = 5
+# synthetic tilesets of SIZE x SIZE tiles, each TILE pixels square, to show how the scan scales
+SIZES = [16, 64]
+TILE = 16
+
+# same layout the editor tilesets use: yellow row marker at x=0, magenta corner, cyan end markers
+def make_tileset(path, count, tile):
+    step = tile + 2
+    surf = pygame.Surface((count * step + 2, count * step + 2))
+    for j in range(count):
+        row = j * step
+        surf.set_at((0, row), spritesheet_loader.ROW_MARKER)
+        for i in range(count):
+            x = i * step + 1
+            surf.fill(((i * 37) % 200 + 20, (j * 53) % 200 + 20, 90), (x + 1, row + 1, tile, tile))
+            surf.set_at((x, row), spritesheet_loader.TILE_MARKER)
+            surf.set_at((x + tile + 1, row), spritesheet_loader.END_MARKER)
+            surf.set_at((x, row + tile + 1), spritesheet_loader.END_MARKER)
+    pygame.image.save(surf, path)
+
+def bench(path):
+    best = None
+    for i in range(RUNS):
+        start = time.perf_counter()
+        spritesheets, spritesheets_data = spritesheet_loader.load_spritesheets(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, sum(len(row) for sheet in spritesheets.values() for row in sheet)
+
+if __name__ == '__main__':
+    pygame.display.set_mode((300, 200))
+    elapsed, tiles = bench('data/images/tilesets/')
+    print('%-24s %6d tiles  %8.2f ms' % ('data/images/tilesets', tiles, elapsed * 1000))
+    out_dir = tempfile.mkdtemp()
+    try:
+        for count in SIZES:
+            path = os.path.join(out_dir, str(count))
+            os.makedirs(path)
+            make_tileset(os.path.join(path, 'synthetic.png'), count, TILE)
+            elapsed, tiles = bench(path)
+            print('%-24s %6d tiles  %8.2f ms' % ('synthetic %dx%d' % (count, count), tiles, elapsed * 1000))
+    finally:
+        shutil.rmtree(out_dir)
@@ -0,0 +1,70 @@
+import ast, time
+
+import _setup
+
+import pygame
+
+import scripts.text as text
+
+# pulls GAME_STORY and the CyberPuzzle questions out of Netguardian.py without running the game
+def load_game_strings():
+    tree = ast.parse(open('Netguardian.py', encoding='utf-8').read())
+    story = []
+    questions = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Assign) and getattr(node.targets[0], 'id', None) == 'GAME_STORY':
+            for lines in ast.literal_eval(node.value).values():
+                story.append('\n'.join(lines))
+        if isinstance(node, ast.Call) and getattr(node.func, 'id', None) == 'CyberPuzzle' and isinstance(node.args[3], ast.Constant):
+            questions.append(ast.literal_eval(node.args[3]))
+    return story, questions
+
+# Font.render as it was before layout(): one font_order.index() lookup and one blit per character
+def render_baseline(font, text, surf, loc, line_width=0):
+    x_offset = 0
+    y_offset = 0
+    if line_width != 0:
+        spaces = []
+        x = 0
+        for i, char in enumerate(text):
+            if char == ' ':
+                spaces.append((x, i))
+                x += font.space_width + font.base_spacing
+            elif char != '\n' and char in font.font_order:
+                x += font.letter_spacing[font.font_order.index(char)] + font.base_spacing
+        line_offset = 0
+        for i, space in enumerate(spaces):
+            if (space[0] - line_offset) > line_width:
+                line_offset += spaces[i - 1][0] - line_offset
+                if i != 0:
+                    text = text[:spaces[i - 1][1]] + '\n' + text[spaces[i - 1][1] + 1:]
+    for char in text:
+        if char not in ['\n', ' ']:
+            surf.blit(font.letters[font.font_order.index(char)], (loc[0] + x_offset, loc[1] + y_offset))
+            x_offset += font.letter_spacing[font.font_order.index(char)] + font.base_spacing
+        elif char == ' ':
+            x_offset += font.space_width + font.base_spacing
+        else:
+            y_offset += font.line_spacing + font.line_height
+            x_offset = 0
+
+def bench(render, strings, line_width=0, duration=1.0):
+    surf = pygame.Surface((300, 600))
+    chars = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < duration:
+        for s in strings:
+            render(s, surf, (0, 0), line_width)
+            chars += len(s)
+    return chars / (time.perf_counter() - start)
+
+if __name__ == '__main__':
+    pygame.display.set_mode((1, 1))
+    font = text.Font('data/fonts/small_font.png', (0, 255, 100))
+    story, questions = load_game_strings()
+    long_story = [' '.join(s.split('\n')) for s in story]
+    baseline = lambda s, surf, loc, line_width: render_baseline(font, s, surf, loc, line_width)
+    for label, strings, line_width in [('GAME_STORY', story, 0), ('puzzle questions', questions, 0), ('GAME_STORY wrapped', long_story, 200)]:
+        old = bench(baseline, strings, line_width)
+        new = bench(font.render, strings, line_width)
+        print('%-19s baseline %10.0f chars/s  layout %10.0f chars/s  (%.1fx)' % (label, old, new, new / old))
@@ -0,0 +1,72 @@
+import os, time, tracemalloc, tempfile, shutil
+
+import _setup
+
+import pygame
+
+import scripts.tile_map as tile_map
+import scripts.map_format as map_format
+import scripts.map_gen as map_gen
+import scripts.spritesheet_loader as spritesheet_loader
+
+LEVELS = ['level_1', 'level_2', 'level_3', 'level_4']
+GENERATED = [100000, 1000000]
+
+# bytes still held once run() returns (whatever it keeps alive through its result) and seconds taken
+def measure(run):
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = run()
+    elapsed = time.perf_counter() - start
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, size, elapsed
+
+# the {(x, y): {layer: [type, column, row]}} dict the loader used to keep for the whole level
+def load_dict(path):
+    if os.path.exists(path):
+        return map_format.read_json(path)[0]
+    return map_format.read_binary(map_format.binary_path(path))[0]
+
+# TileMap.load_map end to end (file read, map cache, TileGrid), then the same map after drawing
+# its first frame, which compiles the render records under the camera
+def load_tilemap(path, spritesheets, spritesheets_data, surf, draw):
+    tile_map.map_cache.clear()
+    level_map = tile_map.TileMap((12, 12), (300, 200), spritesheets, spritesheets_data)
+    level_map.load_map(path)
+    if draw:
+        scroll = (level_map.left * 12 + 50, level_map.top * 12 + 50)
+        level_map.get_visible_records(scroll, tile_map.PICKUP)
+        for layer in level_map.all_layers:
+            level_map.render_layer(surf, scroll, layer)
+    return level_map
+
+def compare(name, path, spritesheets, spritesheets_data, surf):
+    tiles_dict, dict_bytes, dict_time = measure(lambda: load_dict(path))
+    tiles = sum(len(layers) for layers in tiles_dict.values())
+    del tiles_dict
+    level_map, map_bytes, map_time = measure(lambda: load_tilemap(path, spritesheets, spritesheets_data, surf, False))
+    assert level_map.base.tile_count == tiles
+    del level_map
+    level_map, frame_bytes, frame_time = measure(lambda: load_tilemap(path, spritesheets, spritesheets_data, surf, True))
+    del level_map
+    # what a level costs once it's on screen, against the dict it replaced; load_map alone after
+    print('%-10s %8d tiles  after first frame %6.1f B/tile  dict %6.1f B/tile %8.1f ms   load_map %5.1f B/tile %8.2f ms' % (
+        name, tiles, frame_bytes / tiles, dict_bytes / tiles, dict_time * 1000, map_bytes / tiles, map_time * 1000))
+
+if __name__ == '__main__':
+    pygame.display.set_mode((300, 200))
+    surf = pygame.Surface((300, 200)).convert()
+    spritesheets, spritesheets_data = spritesheet_loader.load_spritesheets('data/images/tilesets/')
+    # so the timed loads read the .ngmap, as they do after the asset bake
+    map_format.bake()
+    for name in LEVELS:
+        compare(name, os.path.abspath('data/maps/' + name + '.json'), spritesheets, spritesheets_data, surf)
+    out_dir = tempfile.mkdtemp()
+    try:
+        for tiles in GENERATED:
+            path = os.path.join(out_dir, 'generated_' + str(tiles) + '.json')
+            map_gen.write_generated(path, tiles)
+            compare('generated', path, spritesheets, spritesheets_data, surf)
+    finally:
+        shutil.rmtree(out_dir)
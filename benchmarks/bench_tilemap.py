@@ -0,0 +1,91 @@
+import os, sys, math, time, random, shutil, tempfile
+
+import _setup
+
+import pygame
+
+import scripts.tile_map as tile_map
+import scripts.region_map as region_map
+import scripts.map_format as map_format
+import scripts.map_gen as map_gen
+import scripts.spritesheet_loader as spritesheet_loader
+
+# python benchmarks/bench_tilemap.py [tile counts...]
+SIZES = [10000, 100000, 1000000, 10000000]
+# the old {(x, y): {layer: tile}} load is timed as a baseline up to here; past it the dict alone
+# takes several GB (about 450 B/tile), the TileMap and RegionMap backends run at every size
+DICT_LIMIT = 1000000
+FRAMES = 600
+COLLIDE_CALLS = 20000
+
+# pans right along the middle of the map with a vertical bob, at about the player's speed
+def camera_path(level_map):
+    width = (level_map.right - level_map.left) * 12 - 300
+    height = (level_map.bottom - level_map.top) * 12 - 200
+    for frame in range(FRAMES):
+        x = level_map.left * 12 + (frame * 2.3) % max(width, 1)
+        y = level_map.top * 12 + height / 2 + math.sin(frame * 0.02) * min(height / 3, 150)
+        yield (x, y)
+
+def bench(level_map, path, surf):
+    results = {}
+    start = time.perf_counter()
+    level_map.load_map(path)
+    results['load'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for scroll in camera_path(level_map):
+        level_map.get_visible(scroll)
+    results['visible'] = (time.perf_counter() - start) / FRAMES
+
+    points = [(scroll[0] + random.random() * 300, scroll[1] + random.random() * 200) for scroll in camera_path(level_map)]
+    start = time.perf_counter()
+    for i in range(COLLIDE_CALLS):
+        level_map.tile_collide(points[i % len(points)])
+    results['collide'] = (time.perf_counter() - start) / COLLIDE_CALLS
+
+    # chunk baking included, as it is when the player walks into new ground
+    start = time.perf_counter()
+    for scroll in camera_path(level_map):
+        level_map.get_visible(scroll)
+        for layer in level_map.all_layers:
+            level_map.render_layer(surf, scroll, layer)
+    results['frame'] = (time.perf_counter() - start) / FRAMES
+    return results
+
+# the pre-TileGrid loader: the same .ngmap read into the per-position dict
+def bench_dict(path):
+    start = time.perf_counter()
+    tiles_dict = map_format.read_binary(map_format.binary_path(path))[0]
+    elapsed = time.perf_counter() - start
+    del tiles_dict
+    return elapsed
+
+def report(name, tiles, results):
+    print('%-7s %9d tiles  load %9.1f ms  get_visible %7.1f us  tile_collide %5.2f us  frame %6.2f ms' % (
+        name, tiles, results['load'] * 1000, results['visible'] * 1e6, results['collide'] * 1e6, results['frame'] * 1000))
+
+if __name__ == '__main__':
+    sizes = [int(v) for v in sys.argv[1:]] or SIZES
+    pygame.display.set_mode((300, 200))
+    surf = pygame.Surface((300, 200)).convert()
+    spritesheets, spritesheets_data = spritesheet_loader.load_spritesheets('data/images/tilesets/')
+    out_dir = tempfile.mkdtemp()
+    try:
+        for tiles in sizes:
+            random.seed(0)
+            path = os.path.join(out_dir, 'generated_' + str(tiles) + '.json')
+            columns, types, all_layers, size = map_gen.generate_columns(tiles, emitters=max(tiles // 1000, 10))
+            region_map.write_region_columns(region_map.region_path(path), columns, types, all_layers)
+            map_format.write_columns(map_format.binary_path(path), columns, types, all_layers)
+            del columns
+            if tiles <= DICT_LIMIT:
+                print('%-7s %9d tiles  load %9.1f ms' % ('dict', tiles, bench_dict(path) * 1000))
+            tile_map.map_cache.clear()
+            report('tilemap', tiles, bench(tile_map.TileMap((12, 12), (300, 200), spritesheets, spritesheets_data), path, surf))
+            tile_map.map_cache.clear()
+            regions = region_map.RegionMap((12, 12), (300, 200), spritesheets, spritesheets_data)
+            report('regions', tiles, bench(regions, region_map.region_path(path), surf))
+            regions.stop()
+    finally:
+        shutil.rmtree(out_dir)
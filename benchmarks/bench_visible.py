@@ -0,0 +1,36 @@
+import math, time
+
+import _setup
+
+import scripts.tile_map as tile_map
+import scripts.map_format as map_format
+
+LEVELS = ['level_1', 'level_2', 'level_3', 'level_4']
+FRAMES = 2000
+
+# slow pan across the level with a vertical bob, about what following the player looks like
+def camera_path(level_map):
+    width = (level_map.right - level_map.left) * 12 - 300
+    height = (level_map.bottom - level_map.top) * 12 - 200
+    for frame in range(FRAMES):
+        x = level_map.left * 12 + (frame * 1.3) % max(width, 1)
+        y = level_map.top * 12 + height / 2 + math.sin(frame * 0.02) * height / 3
+        yield (x, y)
+
+def bench(level_map, mask, incremental):
+    start = time.perf_counter()
+    for scroll in camera_path(level_map):
+        if not incremental:
+            level_map.visible_trackers = {}
+        level_map.get_visible_records(scroll, mask)
+    return (time.perf_counter() - start) / FRAMES
+
+if __name__ == '__main__':
+    map_format.bake()
+    for name in LEVELS:
+        level_map = tile_map.TileMap((12, 12), (300, 200))
+        level_map.load_map(name + '.json')
+        for label, mask in [('all tiles', None), ('emitters+pickups', tile_map.EMITTER | tile_map.PICKUP)]:
+            full = bench(level_map, mask, False)
+            tracked = bench(level_map, mask, True)
+            print('%-8s %-17s full scan %7.1f us  incremental %7.1f us' % (name, label, full * 1e6, tracked * 1e6))
@@ -3,6 +3,7 @@ import os, json
 import pygame
 
 from .core_funcs import *
+from . import atlas
 
 ANIMATION_PATH = 'data/images/animations'
 COLORKEY = (0, 0, 0)
@@ -15,6 +16,18 @@ def load_img(path, colorkey):
 class AnimationData:
     def __init__(self, path, colorkey=None):
         self.id = path.split('/')[-1]
+        baked = atlas.animation(path)
+        if baked:
+            self.image_list, self.config = baked
+        else:
+            self.load(path, colorkey)
+        self.frame_surfs = []
+        total = 0
+        for i, frame in enumerate(self.config['frames']):
+            total += frame
+            self.frame_surfs.append([total, self.image_list[i]])
+
+    def load(self, path, colorkey):
         self.image_list = []
         for img in os.listdir(path):
             if img.split('.')[-1] == 'png':
@@ -38,11 +51,6 @@ class AnimationData:
             f.close()
         self.image_list.sort()
         self.image_list = [v[1] for v in self.image_list]
-        self.frame_surfs = []
-        total = 0
-        for i, frame in enumerate(self.config['frames']):
-            total += frame
-            self.frame_surfs.append([total, self.image_list[i]])
 
     @property
     def duration(self):
@@ -0,0 +1,141 @@
+import os
+import sys
+import json
+import math
+
+import pygame
+
+from . import atlas
+from . import spritesheet_loader
+from . import anim_loader
+from . import particles
+from . import map_format
+
+# atlas pages are at most PAGE_SIZE tall and about square up to PAGE_SIZE wide (wider if one sprite needs it)
+PAGE_SIZE = 1024
+PADDING = 1
+
+def colorkey_value(surf):
+    colorkey = surf.get_colorkey()
+    if colorkey is None:
+        return -1
+    return (colorkey[0] << 16) | (colorkey[1] << 8) | colorkey[2]
+
+# (surfaces, group info) for one group, read from its source files the way the game loads them
+def load_group(kind, path):
+    if kind == 'tileset':
+        sheet = spritesheet_loader.load_spritesheet(pygame.image.load(path + '.png').convert())
+        data = None
+        if os.path.exists(path + '.json'):
+            f = open(path + '.json', 'r')
+            data = json.loads(f.read())
+            f.close()
+        return [img for row in sheet for img in row], {'rows': [len(row) for row in sheet], 'data': data}
+    if kind == 'animation':
+        anim = anim_loader.AnimationData(path, anim_loader.COLORKEY)
+        return anim.image_list, {'config': anim.config}
+    if kind == 'particles':
+        images = [pygame.image.load(path + '/' + img).convert() for img in particles.particle_file_sort(os.listdir(path))]
+        for img in images:
+            img.set_colorkey(particles.e_colorkey)
+        return images, {}
+    return [pygame.image.load(path).convert()], {}
+
+# shelf packing, tallest first; returns [(page, x, y)] in input order and the page sizes
+def pack(sizes, page_size=PAGE_SIZE):
+    # a little over the square root of the total area, so the pages stay small to decode
+    area = sum(size[0] * size[1] for size in sizes)
+    width = max([min(page_size, int(math.sqrt(area * 1.3)) + 1)] + [size[0] for size in sizes])
+    places = [None] * len(sizes)
+    heights = [0]
+    page = x = y = shelf = 0
+    for i in sorted(range(len(sizes)), key=lambda i: (-sizes[i][1], -sizes[i][0])):
+        w, h = sizes[i]
+        if x + w > width:
+            x, y, shelf = 0, y + shelf + PADDING, 0
+        if (y + h > page_size) and (y > 0):
+            page, x, y, shelf = page + 1, 0, 0, 0
+            heights.append(0)
+        places[i] = (page, x, y)
+        heights[page] = max(heights[page], y + h)
+        x += w + PADDING
+        shelf = max(shelf, h)
+    return places, [(width, height) for height in heights]
+
+# rebuilds the atlas under path. Groups whose sources kept their mtimes are copied out of the
+# previous atlas instead of being decoded again; with nothing changed it returns without writing.
+# Returns the names of the groups that were read from their sources.
+def bake(path=atlas.BAKE_DIR, roots=atlas.ROOTS, force=False):
+    # the loaders must read the sources, not a previous bake
+    atlas.baked = False
+    roots = [list(root) for root in roots]
+    manifest = os.path.join(path, atlas.MANIFEST)
+    old_meta = None
+    if (not force) and os.path.exists(manifest):
+        try:
+            old_meta, old_records = atlas.read_manifest(manifest)
+        except ValueError:
+            old_meta = None
+    if old_meta and (old_meta['roots'] == roots) and atlas.is_fresh(old_meta):
+        return []
+    old_sprites = atlas.slice_sprites(path, old_meta, old_records) if old_meta else {}
+
+    keys = []
+    images = []
+    groups = {}
+    rebuilt = []
+    for name, (kind, group_path, sources) in atlas.collect_groups([tuple(root) for root in roots]).items():
+        old = old_meta['groups'].get(name) if old_meta else None
+        if old and (old['sources'] == sources):
+            group_images = [old_sprites[atlas.sprite_key(name, i)] for i in range(old['count'])]
+            info = old
+        else:
+            group_images, info = load_group(kind, group_path)
+            info['kind'] = kind
+            info['path'] = os.path.normpath(group_path).replace(os.sep, '/')
+            info['count'] = len(group_images)
+            rebuilt.append(name)
+        groups[name] = info
+        keys += [atlas.sprite_key(name, i) for i in range(len(group_images))]
+        images += group_images
+    # loaders may have written sources (a default animation config.json), so mtimes are read last
+    for name, (kind, group_path, sources) in atlas.collect_groups([tuple(root) for root in roots]).items():
+        groups[name]['sources'] = sources
+
+    places, page_sizes = pack([img.get_size() for img in images])
+    pages = [pygame.Surface(size) for size in page_sizes]
+    for img, place in zip(images, places):
+        raw = img.copy()
+        raw.set_colorkey(None)
+        pages[place[0]].blit(raw, (place[1], place[2]))
+
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    # the old manifest goes first so a half-written bake is never taken as up to date
+    if os.path.exists(manifest):
+        os.remove(manifest)
+    page_names = []
+    for i, page in enumerate(pages):
+        page_names.append('atlas_' + str(i) + '.rgb')
+        atlas.save_page(os.path.join(path, page_names[-1]), page)
+    # pages the new bake doesn't use, including ones an older manifest version left behind
+    for page_name in os.listdir(path):
+        if page_name.startswith('atlas_') and (page_name not in page_names):
+            os.remove(os.path.join(path, page_name))
+    records = [(place[0], place[1], place[2], img.get_width(), img.get_height(), colorkey_value(img)) for img, place in zip(images, places)]
+    atlas.write_manifest(manifest, {'pages': page_names, 'page_sizes': page_sizes, 'roots': roots, 'groups': groups, 'keys': keys}, records)
+    return rebuilt
+
+# python -m scripts.asset_bake [--force] -- the sprite atlas and the binary maps
+if __name__ == '__main__':
+    pygame.display.set_mode((1, 1), pygame.HIDDEN)
+    rebuilt = bake(force='--force' in sys.argv[1:])
+    if rebuilt:
+        print('rebuilt', len(rebuilt), 'group(s):', ', '.join(rebuilt))
+    else:
+        print(atlas.BAKE_DIR, 'is up to date')
+    converted = map_format.bake(force='--force' in sys.argv[1:])
+    if converted:
+        print('converted', len(converted), 'map(s):', ', '.join(converted))
+    else:
+        print(map_format.MAP_DIR, 'is up to date')
@@ -0,0 +1,194 @@
+import os
+import json
+import struct
+
+import numpy as np
+import pygame
+
+# runtime side of the asset bake (see asset_bake): every sprite the game loads at startup packed
+# into a few atlas pages plus a manifest, used in place of the loose PNGs while it's up to date.
+# Pages are raw RGB rather than PNG, so startup reads them straight into a surface instead of
+# decoding them
+BAKE_DIR = 'data/baked'
+MANIFEST = 'manifest.bin'
+# NETGUARDIAN_ATLAS=0 always loads the source images; =trust uses the bake without checking the
+# sources, for builds that ship without them
+ATLAS_MODE = os.environ.get('NETGUARDIAN_ATLAS', '1')
+
+# what gets baked: tileset directories, animation directories, particle directories and loose images
+ROOTS = [
+    ('tileset', 'data/images/tilesets'),
+    ('animation', 'data/images/animations'),
+    ('particles', 'data/images/particles'),
+    ('image', 'data/images/projectile.png'),
+    ('image', 'data/images/door.png'),
+    ('image', 'data/fonts/small_font.png'),
+    ('image', 'data/fonts/large_font.png'),
+]
+
+# manifest layout (little endian):
+#   header   magic, version, sprite count, meta bytes
+#   meta     utf-8 json: pages, page sizes, roots, groups (sources + mtimes, per-kind layout/config), sprite keys
+#   body     uint16 page, x, y, w, h and int32 colorkey (0xRRGGBB, -1 for none) -- one array each
+MAGIC = b'NGAT'
+VERSION = 2
+HEADER = struct.Struct('<4sHII')
+COLUMNS = [('page', '<u2'), ('x', '<u2'), ('y', '<u2'), ('w', '<u2'), ('h', '<u2'), ('colorkey', '<i4')]
+
+# loaded atlas: {'meta': ..., 'sprites': {key: surface}}, False once a load was tried and failed
+baked = None
+
+def group_name(kind, path):
+    return kind + ':' + os.path.normpath(path).replace(os.sep, '/')
+
+def sprite_key(group, i):
+    return group + '/' + str(i)
+
+def mtimes(paths):
+    return {path: os.path.getmtime(path) for path in paths}
+
+# group name -> (kind, path, {source path: mtime}) for everything under roots as it is on disk now
+def collect_groups(roots=ROOTS):
+    groups = {}
+    for kind, root in roots:
+        if kind == 'image':
+            if os.path.exists(root):
+                groups[group_name(kind, root)] = (kind, root, mtimes([root]))
+        elif kind == 'tileset':
+            for name in sorted(os.listdir(root)):
+                if name.split('.')[-1] == 'png':
+                    path = root + '/' + name.split('.')[0]
+                    sources = [root + '/' + name] + ([path + '.json'] if os.path.exists(path + '.json') else [])
+                    groups[group_name(kind, path)] = (kind, path, mtimes(sources))
+        else:
+            for name in sorted(os.listdir(root)):
+                path = root + '/' + name
+                sources = [path + '/' + f for f in sorted(os.listdir(path)) if (f.split('.')[-1] == 'png') or (f == 'config.json')]
+                groups[group_name(kind, path)] = (kind, path, mtimes(sources))
+    return groups
+
+def write_manifest(path, meta, records):
+    meta_bytes = json.dumps(meta).encode('utf-8')
+    f = open(path, 'wb')
+    f.write(HEADER.pack(MAGIC, VERSION, len(records), len(meta_bytes)))
+    f.write(meta_bytes)
+    for i, (name, dtype) in enumerate(COLUMNS):
+        f.write(np.array([record[i] for record in records], dtype=dtype).tobytes())
+    f.close()
+
+# returns (meta, [(page, x, y, w, h, colorkey)])
+def read_manifest(path):
+    f = open(path, 'rb')
+    data = f.read()
+    f.close()
+    magic, version, count, meta_bytes = HEADER.unpack_from(data, 0)
+    if (magic != MAGIC) or (version != VERSION):
+        raise ValueError('not a version ' + str(VERSION) + ' manifest: ' + path)
+    offset = HEADER.size
+    meta = json.loads(data[offset:offset + meta_bytes].decode('utf-8'))
+    offset += meta_bytes
+    columns = []
+    for name, dtype in COLUMNS:
+        columns.append(np.frombuffer(data, dtype=dtype, count=count, offset=offset).tolist())
+        offset += count * np.dtype(dtype).itemsize
+    return meta, list(zip(*columns))
+
+# the manifest is only trusted when every source is still there with the mtime it was baked from
+def is_fresh(meta):
+    groups = collect_groups([tuple(root) for root in meta['roots']])
+    if groups.keys() != meta['groups'].keys():
+        return False
+    return all(groups[name][2] == meta['groups'][name]['sources'] for name in groups)
+
+def load_atlas(path=BAKE_DIR, check=True):
+    manifest = os.path.join(path, MANIFEST)
+    if not os.path.exists(manifest):
+        return None
+    try:
+        meta, records = read_manifest(manifest)
+    except ValueError:
+        # left by an older bake; the sources are used until the next one
+        return None
+    if check and not is_fresh(meta):
+        return None
+    return {'meta': meta, 'sprites': slice_sprites(path, meta, records)}
+
+def save_page(path, page):
+    f = open(path, 'wb')
+    f.write(pygame.image.tobytes(page, 'RGB'))
+    f.close()
+
+def load_page(path, size):
+    f = open(path, 'rb')
+    data = f.read()
+    f.close()
+    return pygame.image.frombuffer(data, size, 'RGB').convert()
+
+# key -> subsurface of its atlas page
+def slice_sprites(path, meta, records):
+    pages = [load_page(os.path.join(path, page), size) for page, size in zip(meta['pages'], meta['page_sizes'])]
+    sprites = {}
+    for key, record in zip(meta['keys'], records):
+        sprite = pages[record[0]].subsurface(pygame.Rect(record[1], record[2], record[3], record[4]))
+        if record[5] != -1:
+            sprite.set_colorkey(((record[5] >> 16) & 255, (record[5] >> 8) & 255, record[5] & 255))
+        sprites[key] = sprite
+    return sprites
+
+# loads the atlas the first time something asks for it; None when there's no usable bake
+def get_baked():
+    global baked
+    if baked is None:
+        baked = ((ATLAS_MODE != '0') and load_atlas(check=ATLAS_MODE != 'trust')) or False
+    return baked or None
+
+def group(kind, path):
+    bake = get_baked()
+    if not bake:
+        return None, None
+    name = group_name(kind, path)
+    return bake, (name if name in bake['meta']['groups'] else None)
+
+# (spritesheets, spritesheets_data) as spritesheet_loader.load_spritesheets returns them, or None
+def spritesheets(path):
+    bake = get_baked()
+    if not bake:
+        return None
+    root = os.path.normpath(path).replace(os.sep, '/')
+    sheets = {}
+    sheets_data = {}
+    for name, info in bake['meta']['groups'].items():
+        if (info['kind'] != 'tileset') or (os.path.dirname(info['path']) != root):
+            continue
+        sheet_name = os.path.basename(info['path'])
+        i = 0
+        rows = []
+        for row_length in info['rows']:
+            rows.append([bake['sprites'][sprite_key(name, j)] for j in range(i, i + row_length)])
+            i += row_length
+        sheets[sheet_name] = rows
+        if info['data'] is not None:
+            sheets_data[sheet_name] = info['data']
+    return (sheets, sheets_data) if sheets else None
+
+# (frames, config) for an animation directory, or None
+def animation(path):
+    bake, name = group('animation', path)
+    if not name:
+        return None
+    info = bake['meta']['groups'][name]
+    return [bake['sprites'][sprite_key(name, i)] for i in range(info['count'])], json.loads(json.dumps(info['config']))
+
+# frames of one particle type directory, or None
+def particle_frames(path):
+    bake, name = group('particles', path)
+    if not name:
+        return None
+    return [bake['sprites'][sprite_key(name, i)] for i in range(bake['meta']['groups'][name]['count'])]
+
+# a loose image, from the atlas when it's baked
+def load_image(path):
+    bake, name = group('image', path)
+    if not name:
+        return pygame.image.load(path).convert()
+    return bake['sprites'][sprite_key(name, 0)]
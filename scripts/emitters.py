@@ -0,0 +1,112 @@
+import math
+import random
+
+import numpy as np
+
+from .tile_map import EMITTER, PICKUP
+
+# emitter specs are keyed by tile type, or by (type, variant), like tile_map.TILE_FLAGS:
+#   'offset'         emitter point relative to the tile's world position
+#   'glows'          (radius, radius_k, green, green_k, blue, blue_k) per glow, drawn as
+#                    radius + (s + 3) * radius_k, (0, green + (s + 4) * green_k, blue + (s + 4) * blue_k)
+#                    with s the emitter's flicker
+#   'after_tiles'    glows go on after the emitter's layer is drawn instead of before it
+#   'spawn_chance'   a particle is spawned on 1 in spawn_chance frames (0 for none)
+#   'spawn_offsets'  extra offsets a spawned particle picks from at random, or None
+#   'particle'       particle type, 'start_frame' its first frame (plus up to 2 at random), 'color' its color
+#   'budget'         most spawns an emitter can bank, 'refill' how many it earns back per 60 fps frame
+#                    (scaled by dt). A spawn costs one, so an emitter never tops refill * 60 particles
+#                    a second whatever the frame rate, nor more than budget in one burst
+
+# emitter: [world pos, spec, phase, layer, spawn tokens, tile pos]
+# phase is the (y % 100 + 200) / 300 flicker speed the torches have always used
+class EmitterSystem:
+    def __init__(self, tile_map, specs):
+        self.tile_map = tile_map
+        self.specs = specs
+        self.version = None
+        # emitters of the loaded level's base tiles, by position; kept across resets so tokens carry over
+        self.base_positions = None
+        self.base_emitters = {}
+        self.compiled = set()
+        self.emitters = []
+        self.tile_x = np.zeros(0, dtype=int)
+        self.tile_y = np.zeros(0, dtype=int)
+        # (layer, after_tiles) -> [(size, color, screen loc)] from the last update
+        self.glows = {}
+
+    def spec(self, tile):
+        return self.specs.get((tile[0], tile[1]), self.specs.get(tile[0]))
+
+    def compile_emitters(self, pos, records):
+        emitters = []
+        for layer, record in records.items():
+            if record[4] & (EMITTER | PICKUP):
+                spec = self.spec(record[1])
+                if spec:
+                    world = (record[0][0] + spec['offset'][0], record[0][1] + spec['offset'][1])
+                    emitters.append([world, spec, (record[0][1] % 100 + 200) / 300, layer, spec['budget'], pos])
+        return emitters
+
+    # the registry: base emitters, minus edited positions, plus whatever the overlay holds now
+    def build(self):
+        level = self.tile_map
+        base_positions = level.flagged_positions(EMITTER | PICKUP)
+        if base_positions is not self.base_positions:
+            self.base_emitters = {}
+            self.compiled = set()
+            self.base_positions = base_positions
+        # a streamed map (see region_map) adds and drops base positions in place
+        for pos in self.compiled - base_positions:
+            self.base_emitters.pop(pos, None)
+        for pos in base_positions - self.compiled:
+            emitters = self.compile_emitters(pos, level.base_records_at(pos))
+            if emitters:
+                self.base_emitters[pos] = emitters
+        self.compiled = set(base_positions)
+        emitters = [emitter for pos, cell in self.base_emitters.items() if pos not in level.overlay for emitter in cell]
+        for pos in level.overlay:
+            records = level.records_at(pos)
+            if records:
+                emitters += self.compile_emitters(pos, records)
+        # same order the tile loop visited them in: by layer, then row by row
+        layer_order = {layer: i for i, layer in enumerate(level.all_layers)}
+        emitters.sort(key=lambda emitter: (layer_order.get(emitter[3], len(layer_order)), emitter[5][1], emitter[5][0]))
+        self.emitters = emitters
+        self.tile_x = np.array([emitter[5][0] for emitter in emitters], dtype=int)
+        self.tile_y = np.array([emitter[5][1] for emitter in emitters], dtype=int)
+        self.version = level.version
+
+    # indices of emitters in the tile window get_visible covers
+    def near(self, scroll):
+        window = self.tile_map.visible_window(scroll)
+        return np.flatnonzero((self.tile_x >= window[0]) & (self.tile_x < window[0] + window[2]) &
+                              (self.tile_y >= window[1]) & (self.tile_y < window[1] + window[3])).tolist()
+
+    # spawns particles for the emitters near the view and works out this frame's glows
+    def update(self, scroll, game_time, particles, dt=1):
+        if self.version != self.tile_map.version:
+            self.build()
+        self.glows = {}
+        for i in self.near(scroll):
+            emitter = self.emitters[i]
+            spec = emitter[1]
+            emitter[4] = min(emitter[4] + spec['refill'] * dt, spec['budget'])
+            if spec['spawn_chance'] and (random.randint(1, spec['spawn_chance']) == 1) and (emitter[4] >= 1):
+                emitter[4] -= 1
+                x = emitter[0][0]
+                y = emitter[0][1]
+                if spec['spawn_offsets']:
+                    p_offset = random.choice(spec['spawn_offsets'])
+                    x += p_offset[0]
+                    y += p_offset[1]
+                particles.add(x, y, spec['particle'], [random.randint(0, 10) / 10 - 0.5, random.randint(0, 10) / 10 - 2], 0.1, spec['start_frame'] + random.randint(0, 20) / 10, custom_color=spec['color'])
+            if spec['glows']:
+                s = math.sin(emitter[2] * game_time * 0.01)
+                loc = (emitter[0][0] - scroll[0], emitter[0][1] - scroll[1])
+                glows = self.glows.setdefault((emitter[3], spec['after_tiles']), [])
+                for glow in spec['glows']:
+                    glows.append((glow[0] + (s + 3) * glow[1], (0, glow[2] + (s + 4) * glow[3], glow[4] + (s + 4) * glow[5]), loc))
+
+    def get_glows(self, layer, after_tiles=False):
+        return self.glows.get((layer, after_tiles), [])
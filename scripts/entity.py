@@ -4,7 +4,10 @@ import pygame
 
 from .core_funcs import *
 
+# obj_list is a list of rects or a spatial index with query_rect (like TileMap)
 def collision_list(obj, obj_list):
+    if hasattr(obj_list, 'query_rect'):
+        return obj_list.query_rect(obj)
     hit_list = []
     for r in obj_list:
         if obj.colliderect(r):
@@ -0,0 +1,53 @@
+import numpy as np
+import pygame
+
+from .particles import glow_surf
+
+# disc kernels at buffer resolution, keyed by the cached glow surface they were read from
+KERNEL_CACHE_SIZE = 256
+
+class LightBuffer:
+    def __init__(self, size, scale=1):
+        self.size = size
+        self.scale = scale
+        self.buffer_size = (size[0] // scale, size[1] // scale)
+        # surfarray layout is (x, y, rgb); uint16 so a frame's worth of glows can't wrap
+        self.buffer = np.zeros((self.buffer_size[0], self.buffer_size[1], 3), dtype=np.uint16)
+        self.surf = pygame.Surface(self.buffer_size)
+        self.kernels = {}
+        self.count = 0
+
+    def kernel(self, size, color):
+        glow = glow_surf(size / self.scale, color)
+        kernel = self.kernels.get(glow)
+        if kernel is None:
+            if len(self.kernels) >= KERNEL_CACHE_SIZE:
+                self.kernels.pop(next(iter(self.kernels)))
+            kernel = pygame.surfarray.array3d(glow).astype(np.uint16)
+            self.kernels[glow] = kernel
+        return kernel
+
+    # same placement as particles.blit_center_add, truncating the corner the way Surface.blit does
+    def add(self, size, color, loc):
+        kernel = self.kernel(size, color)
+        w, h = kernel.shape[:2]
+        x = int(loc[0] / self.scale - w // 2)
+        y = int(loc[1] / self.scale - h // 2)
+        x1 = min(x + w, self.buffer_size[0])
+        y1 = min(y + h, self.buffer_size[1])
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        if x0 >= x1 or y0 >= y1:
+            return
+        self.buffer[x0:x1, y0:y1] += kernel[x0 - x:x1 - x, y0 - y:y1 - y]
+        self.count += 1
+
+    def composite(self, surface):
+        if self.count:
+            pygame.surfarray.blit_array(self.surf, np.minimum(self.buffer, 255))
+            light = self.surf
+            if self.scale != 1:
+                light = pygame.transform.smoothscale(light, self.size)
+            surface.blit(light, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+            self.buffer.fill(0)
+        self.count = 0
@@ -0,0 +1,144 @@
+import os
+import json
+import mmap
+import struct
+import sys
+
+import numpy as np
+
+# binary level layout (little endian):
+#   header   magic, version, tile count, left, right, top, bottom, layer count, type count, type table bytes
+#   layers   int16[layer count]
+#   types    type names joined by '\n' (utf-8), indexed by type id
+#   body     int16 x, int16 y, int16 layer, uint16 type id, int16 column, int16 row -- one array each, tile count long
+# a position left with no layers (the editor keeps those) is stored as one row with type id EMPTY
+MAGIC = b'NGMP'
+VERSION = 1
+EXTENSION = '.ngmap'
+# where bake() looks for editor maps
+MAP_DIR = 'data/maps'
+HEADER = struct.Struct('<4sHI4hHHI')
+EMPTY = 0xFFFF
+COLUMNS = [('x', '<i2'), ('y', '<i2'), ('layer', '<i2'), ('type', '<u2'), ('column', '<i2'), ('row', '<i2')]
+
+# json map keys are 'x;y'
+def tuple_to_str(tp):
+    return ';'.join([str(v) for v in tp])
+
+def str_to_tuple(s):
+    return tuple([int(v) for v in s.split(';')])
+
+def binary_path(path):
+    if path.endswith('.json'):
+        path = path[:-len('.json')]
+    return path + EXTENSION
+
+# editor json -> (tuplified {(x, y): {layer: [type, column, row]}} dict, all_layers)
+def read_json(path):
+    f = open(path, 'r')
+    json_dat = json.loads(f.read())
+    f.close()
+    tile_map = {}
+    for pos, tiles in json_dat['map'].items():
+        tile_map[str_to_tuple(pos)] = {int(layer): tiles[layer] for layer in tiles}
+    return tile_map, json_dat['all_layers']
+
+# writes the .ngmap next to an editor json and returns its path
+def convert(json_path):
+    tile_map, all_layers = read_json(json_path)
+    path = binary_path(json_path)
+    # written aside and renamed so a crash never leaves a half-written map that looks up to date
+    write_binary(path + '.tmp', tile_map, all_layers)
+    os.replace(path + '.tmp', path)
+    return path
+
+def is_fresh(json_path):
+    path = binary_path(json_path)
+    return os.path.exists(path) and (os.path.getmtime(path) >= os.path.getmtime(json_path))
+
+# converts every json under directory whose .ngmap is missing or older; returns the new binaries.
+# The binaries aren't committed, so this runs as part of the asset bake (python -m scripts.asset_bake)
+def bake(directory=MAP_DIR, force=False):
+    converted = []
+    for name in sorted(os.listdir(directory)):
+        json_path = os.path.join(directory, name)
+        if name.endswith('.json') and (force or not is_fresh(json_path)):
+            converted.append(convert(json_path))
+    return converted
+
+# tile_map is the tuplified {(x, y): {layer: [type, column, row]}} dict
+def write_binary(path, tile_map, all_layers):
+    types = []
+    type_ids = {}
+    columns = {name: [] for name, dtype in COLUMNS}
+    for pos in tile_map:
+        if not tile_map[pos]:
+            for name, value in zip(['x', 'y', 'layer', 'type', 'column', 'row'], [pos[0], pos[1], 0, EMPTY, 0, 0]):
+                columns[name].append(value)
+        for layer, tile in tile_map[pos].items():
+            if tile[0] not in type_ids:
+                type_ids[tile[0]] = len(types)
+                types.append(tile[0])
+            for name, value in zip(['x', 'y', 'layer', 'type', 'column', 'row'], [pos[0], pos[1], layer, type_ids[tile[0]], tile[1], tile[2]]):
+                columns[name].append(value)
+    write_columns(path, {name: np.array(columns[name], dtype=dtype) for name, dtype in COLUMNS}, types, all_layers)
+
+# columns holds one array per COLUMNS entry; type ids index types
+def write_columns(path, columns, types, all_layers):
+    type_table = '\n'.join(types).encode('utf-8')
+    count = len(columns['x'])
+    # the casts below would wrap silently, so anything outside a column's range is refused up front
+    for name, dtype in COLUMNS:
+        values = np.asarray(columns[name])
+        if len(values) and ((values.min() < np.iinfo(dtype).min) or (values.max() > np.iinfo(dtype).max)):
+            raise ValueError(name + ' values ' + str(values.min()) + '..' + str(values.max()) + ' do not fit ' + np.dtype(dtype).name + ': ' + path)
+    xs = np.asarray(columns['x']) if count else np.zeros(1)
+    ys = np.asarray(columns['y']) if count else np.zeros(1)
+    f = open(path, 'wb')
+    f.write(HEADER.pack(MAGIC, VERSION, count, int(xs.min()), int(xs.max()), int(ys.min()), int(ys.max()), len(all_layers), len(types), len(type_table)))
+    f.write(np.array(all_layers, dtype='<i2').tobytes())
+    f.write(type_table)
+    for name, dtype in COLUMNS:
+        f.write(np.asarray(columns[name], dtype=dtype).tobytes())
+    f.close()
+
+# returns (columns, types, all_layers, (left, right, top, bottom)), columns as in write_columns
+def read_columns(path):
+    f = open(path, 'rb')
+    data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    f.close()
+    magic, version, count, left, right, top, bottom, layer_count, type_count, type_bytes = HEADER.unpack_from(data, 0)
+    if (magic != MAGIC) or (version != VERSION):
+        data.close()
+        raise ValueError('not a version ' + str(VERSION) + ' map: ' + path)
+    offset = HEADER.size
+    all_layers = np.frombuffer(data, dtype='<i2', count=layer_count, offset=offset).tolist()
+    offset += layer_count * 2
+    types = data[offset:offset + type_bytes].decode('utf-8').split('\n') if type_count else []
+    offset += type_bytes
+    columns = {}
+    for name, dtype in COLUMNS:
+        columns[name] = np.frombuffer(data, dtype=dtype, count=count, offset=offset).copy()
+        offset += count * 2
+    data.close()
+    return columns, types, all_layers, (left, right, top, bottom)
+
+# returns (tile_map, all_layers, (left, right, top, bottom))
+def read_binary(path):
+    columns, types, all_layers, bounds = read_columns(path)
+    tile_map = {}
+    for x, y, layer, type_id, column, row in zip(*[columns[name].tolist() for name, dtype in COLUMNS]):
+        pos = (x, y)
+        if pos not in tile_map:
+            tile_map[pos] = {}
+        if type_id != EMPTY:
+            tile_map[pos][layer] = [types[type_id], column, row]
+    return tile_map, all_layers, bounds
+
+# python -m scripts.map_format [data/maps/level_1.json ...], every stale map under MAP_DIR by default
+if __name__ == '__main__':
+    for json_path in sys.argv[1:]:
+        print(json_path, '->', convert(json_path))
+    if not sys.argv[1:]:
+        for path in bake():
+            print('->', path)
@@ -0,0 +1,88 @@
+import sys
+import json
+import math
+
+import numpy as np
+
+from . import map_format
+
+# synthetic levels for scaling tests: the same layers and tile variants as the source level, drawn
+# with the source level's frequencies, scattered over a WIDE_RATIO:1 area at the given density
+SOURCE_MAP = 'data/maps/level_1.json'
+WIDE_RATIO = 4
+# (type, variant) that the tile loop treats as emitters/pickups; placed separately so their count is exact
+EMITTER_TILES = {('torches', 0), ('torches', 1), ('decorations', 0), ('mana', 0)}
+
+# [(layer, type, column, row)] and how often each one shows up in the source level
+def tile_palette(path=SOURCE_MAP):
+    f = open(path, 'r')
+    json_dat = json.loads(f.read())
+    f.close()
+    counts = {}
+    for tiles in json_dat['map'].values():
+        for layer, tile in tiles.items():
+            key = (int(layer), tile[0], tile[1], tile[2])
+            counts[key] = counts.get(key, 0) + 1
+    palette = sorted(counts)
+    return palette, [counts[key] for key in palette], json_dat['all_layers']
+
+# map_format columns for a level of about `tiles` tiles (one per position) with `emitters` of them
+# torches/decorations/mana. Returns (columns, types, all_layers, (width, height)).
+def generate_columns(tiles, density=0.4, emitters=50, seed=0, source=SOURCE_MAP):
+    rng = np.random.default_rng(seed)
+    palette, weights, all_layers = tile_palette(source)
+    types = sorted(set(entry[1] for entry in palette))
+    type_index = {name: i for i, name in enumerate(types)}
+
+    area = int(math.ceil(tiles / density))
+    height = max(int(math.sqrt(area / WIDE_RATIO)), 1)
+    width = int(math.ceil(area / height))
+    # exactly `tiles` distinct positions
+    cells = np.sort(rng.choice(width * height, size=min(tiles, width * height), replace=False))
+    count = len(cells)
+
+    plain = [i for i, entry in enumerate(palette) if (entry[1], entry[2]) not in EMITTER_TILES]
+    special = [i for i, entry in enumerate(palette) if (entry[1], entry[2]) in EMITTER_TILES]
+    plain_weights = np.array([weights[i] for i in plain], dtype=float)
+    picks = np.array(plain)[rng.choice(len(plain), size=count, p=plain_weights / plain_weights.sum())]
+    if special and emitters:
+        special_weights = np.array([weights[i] for i in special], dtype=float)
+        slots = rng.choice(count, size=min(emitters, count), replace=False)
+        picks[slots] = np.array(special)[rng.choice(len(special), size=len(slots), p=special_weights / special_weights.sum())]
+
+    layer_table = np.array([entry[0] for entry in palette])
+    type_table = np.array([type_index[entry[1]] for entry in palette])
+    column_table = np.array([entry[2] for entry in palette])
+    row_table = np.array([entry[3] for entry in palette])
+    columns = {
+        'x': cells % width,
+        'y': cells // width,
+        'layer': layer_table[picks],
+        'type': type_table[picks],
+        'column': column_table[picks],
+        'row': row_table[picks],
+    }
+    return columns, types, all_layers, (width, height)
+
+# tuplified {(x, y): {layer: [type, column, row]}} for handing straight to a TileMap
+def columns_to_map(columns, types):
+    tile_map = {}
+    for x, y, layer, type_id, column, row in zip(*[columns[name].tolist() for name, dtype in map_format.COLUMNS]):
+        tile_map[(x, y)] = {layer: [types[type_id], column, row]}
+    return tile_map
+
+# writes an .ngmap that TileMap.load_map picks up for `path` (the .json itself isn't written)
+def write_generated(path, tiles, density=0.4, emitters=50, seed=0):
+    columns, types, all_layers, size = generate_columns(tiles, density, emitters, seed)
+    map_format.write_columns(map_format.binary_path(path), columns, types, all_layers)
+    return size
+
+# python -m scripts.map_gen data/maps/generated.json 1000000 [density] [emitters] [seed]
+if __name__ == '__main__':
+    path = sys.argv[1]
+    tiles = int(sys.argv[2])
+    density = float(sys.argv[3]) if len(sys.argv) > 3 else 0.4
+    emitters = int(sys.argv[4]) if len(sys.argv) > 4 else 50
+    seed = int(sys.argv[5]) if len(sys.argv) > 5 else 0
+    size = write_generated(path, tiles, density, emitters, seed)
+    print(map_format.binary_path(path), str(size[0]) + 'x' + str(size[1]), tiles, 'tiles')
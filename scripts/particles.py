@@ -1,18 +1,63 @@
 import os
+import math
 import random
+from collections import OrderedDict
 
+import numpy as np
 import pygame
 
+from . import atlas
+
 global e_colorkey
 e_colorkey = (0, 0, 0)
 global particle_images
 particle_images = {}
 
+# colored particle sprites keyed by (type, frame, color)
+TINT_CACHE_SIZE = 512
+
+tint_cache = OrderedDict()
+
+# glows are snapped to these steps so the flicker from math.sin reuses a small set of surfaces
+GLOW_RADIUS_STEP = 1
+GLOW_COLOR_STEP = 1
+GLOW_CACHE_SIZE = 256
+
+glow_cache = OrderedDict()
+glow_cache_stats = {'hits': 0, 'misses': 0}
+
 def circle_surf(size, color):
     surf = pygame.Surface((size * 2 + 2, size * 2 + 2))
     pygame.draw.circle(surf, color, (size + 1, size + 1), size)
     return surf
 
+def glow_surf(size, color):
+    size = int(size / GLOW_RADIUS_STEP) * GLOW_RADIUS_STEP
+    color = tuple(int(c / GLOW_COLOR_STEP) * GLOW_COLOR_STEP for c in color)
+    key = (size, color)
+    surf = glow_cache.get(key)
+    if surf is not None:
+        glow_cache.move_to_end(key)
+        glow_cache_stats['hits'] += 1
+        return surf
+    glow_cache_stats['misses'] += 1
+    surf = circle_surf(size, color)
+    glow_cache[key] = surf
+    if len(glow_cache) > GLOW_CACHE_SIZE:
+        glow_cache.popitem(last=False)
+    return surf
+
+def glow_cache_info():
+    lookups = glow_cache_stats['hits'] + glow_cache_stats['misses']
+    return {
+        'hits': glow_cache_stats['hits'],
+        'misses': glow_cache_stats['misses'],
+        'hit_rate': glow_cache_stats['hits'] / lookups if lookups else 0,
+        'size': len(glow_cache),
+        'max_size': GLOW_CACHE_SIZE,
+        'bytes': sum(surf.get_width() * surf.get_height() * surf.get_bytesize() for surf in glow_cache.values()),
+    }
+
 def blit_center(target_surf, surf, loc):
     target_surf.blit(surf, (loc[0] - surf.get_width() // 2, loc[1] - surf.get_height() // 2))
 
@@ -29,21 +74,41 @@ def particle_file_sort(l):
         l3.append(str(obj) + '.png')
     return l3
 
-def load_particle_images(path):
+# palette colors are tinted up front so the first burst of each color doesn't stall a frame
+def load_particle_images(path, palette=None):
     global particle_images, e_colorkey
     file_list = os.listdir(path)
     for folder in file_list:
         #try:
-        img_list = os.listdir(path + '/' + folder)
-        img_list = particle_file_sort(img_list)
-        images = []
-        for img in img_list:
-            images.append(pygame.image.load(path + '/' + folder + '/' + img).convert())
+        images = atlas.particle_frames(path + '/' + folder)
+        if images is None:
+            img_list = os.listdir(path + '/' + folder)
+            img_list = particle_file_sort(img_list)
+            images = []
+            for img in img_list:
+                images.append(pygame.image.load(path + '/' + folder + '/' + img).convert())
         for img in images:
             img.set_colorkey(e_colorkey)
         particle_images[folder] = images.copy()
         #except:
         #    pass
+    for color in palette or []:
+        for particle_type in particle_images:
+            for frame in range(len(particle_images[particle_type])):
+                get_tinted(particle_type, frame, color)
+
+def get_tinted(particle_type, frame, color):
+    key = (particle_type, frame, tuple(color))
+    img = tint_cache.get(key)
+    if img is not None:
+        tint_cache.move_to_end(key)
+        return img
+    # tint a copy so the shared frame keeps its black colorkey
+    img = swap_color(particle_images[particle_type][frame].copy(), (255, 255, 255), color)
+    tint_cache[key] = img
+    if len(tint_cache) > TINT_CACHE_SIZE:
+        tint_cache.popitem(last=False)
+    return img
 
 class Particle(object):
 
@@ -70,7 +135,7 @@ class Particle(object):
             if self.color == None:
                 blit_center(surface,particle_images[self.type][int(self.frame)],(self.x-scroll[0],self.y-scroll[1]))
             else:
-                blit_center(surface,swap_color(particle_images[self.type][int(self.frame)],(255,255,255),self.color),(self.x-scroll[0],self.y-scroll[1]))
+                blit_center(surface,get_tinted(self.type,int(self.frame),self.color),(self.x-scroll[0],self.y-scroll[1]))
 
     def update(self, dt):
         self.frame += self.decay_rate * dt
@@ -89,6 +154,141 @@ class Particle(object):
         return running
 
 
+# glow color of light-emitting particle types as base + time_left * scale
+GLOW_TYPES = {
+    'light': ((0, 1, 4), (0, 0.4, 0.8)),
+    'red_light': ((8, 1, 4), (0.6, 0.2, 0.4)),
+}
+
+# moves live entries from the tail into dead slots so the first new_count entries are the live ones
+def compact_arrays(arrays, alive, count):
+    dead = np.flatnonzero(~alive)
+    new_count = count - len(dead)
+    holes = dead[dead < new_count]
+    movers = np.flatnonzero(alive[new_count:]) + new_count
+    for array in arrays:
+        array[holes] = array[movers]
+    return new_count
+
+# structure-of-arrays replacement for a list of Particle objects
+class ParticleSystem:
+    def __init__(self, capacity=1024):
+        self.type_names = list(particle_images)
+        self.type_ids = {name: i for i, name in enumerate(self.type_names)}
+        self.frame_counts = np.array([len(particle_images[name]) for name in self.type_names])
+        max_frames = max(self.frame_counts)
+        self.half_sizes = np.zeros((len(self.type_names), max_frames + 1, 2))
+        for i, name in enumerate(self.type_names):
+            for j, img in enumerate(particle_images[name]):
+                self.half_sizes[i, j] = (img.get_width() // 2, img.get_height() // 2)
+        self.colors = [None]
+        self.color_ids = {None: 0}
+        self.count = 0
+        self.capacity = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        count = self.count
+        arrays = {
+            'x': np.float64, 'y': np.float64, 'vx': np.float64, 'vy': np.float64,
+            'frame': np.float64, 'decay_rate': np.float64, 'random_constant': np.float64,
+            'type': np.int32, 'color': np.int32, 'physics': np.bool_,
+        }
+        for name, dtype in arrays.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                array[:count] = getattr(self, name)[:count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    @property
+    def arrays(self):
+        return [self.x, self.y, self.vx, self.vy, self.frame, self.decay_rate, self.random_constant, self.type, self.color, self.physics]
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    # same arguments as Particle(...)
+    def add(self, x, y, particle_type, motion, decay_rate, start_frame, custom_color=None, physics=False):
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+        if custom_color is not None:
+            custom_color = tuple(custom_color)
+        if custom_color not in self.color_ids:
+            self.color_ids[custom_color] = len(self.colors)
+            self.colors.append(custom_color)
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.vx[i] = motion[0]
+        self.vy[i] = motion[1]
+        self.frame[i] = start_frame
+        self.decay_rate[i] = decay_rate
+        self.random_constant[i] = random.randint(20, 30) / 30
+        self.type[i] = self.type_ids[particle_type]
+        self.color[i] = self.color_ids[custom_color]
+        self.physics[i] = physics
+        self.count += 1
+
+    def time_left(self):
+        n = self.count
+        return self.frame_counts[self.type[:n]] + 1 - self.frame[:n]
+
+    # drops particles that finished last frame, then advances everything in one step
+    def update(self, dt):
+        n = self.count
+        alive = self.frame[:n] < self.frame_counts[self.type[:n]]
+        if not alive.all():
+            n = self.count = compact_arrays(self.arrays, alive, n)
+        self.frame[:n] += self.decay_rate[:n] * dt
+        step = dt * ~self.physics[:n]
+        self.x[:n] += self.vx[:n] * step
+        self.y[:n] += self.vy[:n] * step
+
+    def get_image(self, type_id, frame, color_id):
+        if color_id:
+            return get_tinted(self.type_names[type_id], frame, self.colors[color_id])
+        return particle_images[self.type_names[type_id]][frame]
+
+    def draw(self, surface, scroll):
+        n = self.count
+        types = self.type[:n]
+        frames = self.frame[:n].astype(np.int32)
+        visible = np.flatnonzero(frames < self.frame_counts[types])
+        if not len(visible):
+            return
+        types = types[visible]
+        frames = frames[visible]
+        colors = self.color[visible]
+        half_sizes = self.half_sizes[types, frames]
+        xs = (self.x[visible] - scroll[0] - half_sizes[:, 0]).astype(np.int32)
+        ys = (self.y[visible] - scroll[1] - half_sizes[:, 1]).astype(np.int32)
+        # one surface lookup per distinct (type, frame, color) instead of per particle
+        sprite_keys = (types * self.half_sizes.shape[1] + frames) * len(self.colors) + colors
+        keys, first, inverse = np.unique(sprite_keys, return_index=True, return_inverse=True)
+        sprites = [self.get_image(types[i], frames[i], colors[i]) for i in first]
+        surface.blits(zip(map(sprites.__getitem__, inverse.tolist()), zip(xs.tolist(), ys.tolist())), doreturn=False)
+
+    # (x, y, radius, color) for every glowing particle, matching the per-particle glow in the main loop
+    def glows(self, game_time):
+        n = self.count
+        time_left = self.time_left()
+        output = []
+        for name, (base, scale) in GLOW_TYPES.items():
+            if name not in self.type_ids:
+                continue
+            idx = np.flatnonzero((self.type[:n] == self.type_ids[name]) & (time_left > 0))
+            if not len(idx):
+                continue
+            tl = time_left[idx]
+            radius = np.maximum(1, 5 + tl * 0.5 * (np.sin(self.random_constant[idx] * game_time * 0.01) + 3))
+            color = np.array(base) + tl[:, None] * np.array(scale)
+            output += zip(self.x[idx].tolist(), self.y[idx].tolist(), radius.tolist(), map(tuple, color.tolist()))
+        return output
+
 # other useful functions
 
 def swap_color(img,old_c,new_c):
@@ -99,3 +299,91 @@ def swap_color(img,old_c,new_c):
     surf.blit(img,(0,0))
     surf.set_colorkey(e_colorkey)
     return surf
+
+# polygon corners relative to a spark's heading: (angle offset, fraction of speed * scale)
+SPARK_SHAPE = ((0, 1), (np.pi / 2, 0.1), (np.pi, 0.6), (-np.pi / 2, 0.1))
+
+# array-backed replacement for the [pos, angle, speed, scale, color] spark lists
+class Sparks:
+    def __init__(self, capacity=256):
+        self.colors = []
+        self.color_ids = {}
+        self.count = 0
+        self.capacity = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        count = self.count
+        arrays = {'x': np.float64, 'y': np.float64, 'angle': np.float64, 'speed': np.float64, 'scale': np.float64, 'color': np.int32}
+        for name, dtype in arrays.items():
+            array = np.zeros(capacity, dtype=dtype)
+            if self.capacity:
+                array[:count] = getattr(self, name)[:count]
+            setattr(self, name, array)
+        self.capacity = capacity
+
+    @property
+    def arrays(self):
+        return [self.x, self.y, self.angle, self.speed, self.scale, self.color]
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def add(self, loc, angle, speed, scale, color):
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+        color = tuple(color)
+        if color not in self.color_ids:
+            self.color_ids[color] = len(self.colors)
+            self.colors.append(color)
+        i = self.count
+        self.x[i] = loc[0]
+        self.y[i] = loc[1]
+        self.angle[i] = angle
+        self.speed[i] = speed
+        self.scale[i] = scale
+        self.color[i] = self.color_ids[color]
+        self.count += 1
+
+    # `count` sparks fanned +-40 degrees around `angle`, e.g. from a projectile spawn
+    def spray(self, loc, angle, count, speed, scale, color):
+        for i in range(count):
+            self.add(loc, angle + math.radians(random.randint(0, 80) - 40), speed + random.randint(0, 30) / 10, scale, color)
+
+    # `count` sparks in random directions, e.g. on death
+    def burst(self, loc, count, speed, scale, color):
+        for i in range(count):
+            self.add(loc, math.radians(random.randint(1, 360)), speed + random.randint(0, 30) / 10, scale, color)
+
+    def update(self, dt):
+        n = self.count
+        step = self.speed[:n] * dt
+        self.x[:n] += np.cos(self.angle[:n]) * step
+        self.y[:n] += np.sin(self.angle[:n]) * step
+        self.speed[:n] -= 0.2 * dt
+        alive = self.speed[:n] >= 0
+        if not alive.all():
+            self.count = compact_arrays(self.arrays, alive, n)
+
+    # (N, 4, 2) polygon corners in world space
+    def polygons(self):
+        n = self.count
+        offsets = np.array([offset for offset, length in SPARK_SHAPE])
+        lengths = np.array([length for offset, length in SPARK_SHAPE])
+        angles = self.angle[:n, None] + offsets
+        dist = (self.speed[:n] * self.scale[:n])[:, None] * lengths
+        points = np.empty((n, 4, 2))
+        points[:, :, 0] = self.x[:n, None] + np.cos(angles) * dist
+        points[:, :, 1] = self.y[:n, None] + np.sin(angles) * dist
+        return points
+
+    def draw(self, surface, scroll):
+        points = self.polygons()
+        points[:, :, 0] -= scroll[0]
+        points[:, :, 1] -= scroll[1]
+        colors = self.colors
+        for color_id, polygon in zip(self.color[:self.count].tolist(), points.tolist()):
+            pygame.draw.polygon(surface, colors[color_id], polygon)
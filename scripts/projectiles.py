@@ -0,0 +1,78 @@
+import numpy as np
+
+# projectiles move vel * SPEED_SCALE per frame
+SPEED_SCALE = 0.2
+# distance past the view edge before a projectile counts as offscreen
+OFFSCREEN_MARGIN = 50
+
+# enemy projectiles as position/velocity arrays, kept in spawn order (oldest first)
+class ProjectileManager:
+    def __init__(self, capacity=512):
+        self.count = 0
+        self.capacity = 0
+        self.grow(capacity)
+
+    def grow(self, capacity):
+        pos = np.zeros((capacity, 2))
+        vel = np.zeros((capacity, 2))
+        if self.capacity:
+            pos[:self.count] = self.pos[:self.count]
+            vel[:self.count] = self.vel[:self.count]
+        self.pos = pos
+        self.vel = vel
+        self.capacity = capacity
+
+    def __len__(self):
+        return self.count
+
+    def clear(self):
+        self.count = 0
+
+    def add(self, pos, vel):
+        if self.count == self.capacity:
+            self.grow(self.capacity * 2)
+        self.pos[self.count] = pos
+        self.vel[self.count] = vel
+        self.count += 1
+
+    def update(self, dt):
+        n = self.count
+        self.pos[:n] += self.vel[:n] * (SPEED_SCALE * dt)
+
+    def offscreen(self, scroll, size):
+        pos = self.pos[:self.count]
+        return ((pos[:, 0] < scroll[0] - OFFSCREEN_MARGIN) | (pos[:, 0] > scroll[0] + size[0] + OFFSCREEN_MARGIN) |
+                (pos[:, 1] < scroll[1] - OFFSCREEN_MARGIN) | (pos[:, 1] > scroll[1] + size[1] + OFFSCREEN_MARGIN))
+
+    # drops projectiles past the margin, keeping spawn order, and returns how many left
+    def retire_offscreen(self, scroll, size):
+        gone = self.offscreen(scroll, size)
+        retired = int(gone.sum())
+        if retired:
+            keep = ~gone
+            n = self.count - retired
+            self.pos[:n] = self.pos[:self.count][keep]
+            self.vel[:n] = self.vel[:self.count][keep]
+            self.count = n
+        return retired
+
+    # same test as rect.collidepoint for every projectile
+    def hits(self, rect):
+        pos = self.pos[:self.count].astype(int)
+        return ((pos[:, 0] >= rect.left) & (pos[:, 0] < rect.right) &
+                (pos[:, 1] >= rect.top) & (pos[:, 1] < rect.bottom)).any()
+
+    # screen positions of projectiles within `margin` pixels of the view
+    def visible(self, scroll, size, margin=0):
+        pos = self.pos[:self.count] - scroll
+        mask = ((pos[:, 0] > -margin) & (pos[:, 0] < size[0] + margin) &
+                (pos[:, 1] > -margin) & (pos[:, 1] < size[1] + margin))
+        return pos[mask].tolist()
+
+    # keeps only the newest `limit` projectiles
+    def cap(self, limit):
+        if self.count > limit:
+            drop = self.count - limit
+            self.pos[:limit] = self.pos[drop:self.count]
+            self.vel[:limit] = self.vel[drop:self.count]
+            self.count = limit
@@ -0,0 +1,252 @@
+import os
+import sys
+import json
+import queue
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pygame
+
+from .tile_map import TileMap, COLLISION_TYPES, CHUNK_SIZE, tile_flags
+from . import map_format
+
+# a region map is a directory of REGION_SIZE x REGION_SIZE tile regions, each one a map_format
+# file, plus an index with the layers, bounds and which regions exist
+REGION_SIZE = 64
+REGION_EXTENSION = '.regions'
+INDEX_FILE = 'index.json'
+# most regions kept in memory; the ones around the camera are never evicted
+REGION_BUDGET = 16
+# regions within this many tiles of the view are requested from the loader thread ahead of time
+STREAM_MARGIN = 32
+
+def region_path(path):
+    if path.endswith('.json'):
+        path = path[:-len('.json')]
+    return path + REGION_EXTENSION
+
+def region_file(path, key):
+    return os.path.join(path, str(key[0]) + '_' + str(key[1]) + map_format.EXTENSION)
+
+# tile_map is the tuplified {(x, y): {layer: [type, column, row]}} dict
+def write_regions(path, tile_map, all_layers, region_size=REGION_SIZE):
+    regions = {}
+    for pos in tile_map:
+        regions.setdefault((pos[0] // region_size, pos[1] // region_size), {})[pos] = tile_map[pos]
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    for key in regions:
+        map_format.write_binary(region_file(path, key), regions[key], all_layers)
+    xs = [pos[0] for pos in tile_map] or [0]
+    ys = [pos[1] for pos in tile_map] or [0]
+    write_index(path, region_size, all_layers, [min(xs), max(xs), min(ys), max(ys)], sorted(regions))
+
+# same as write_regions for map_format columns (see map_gen), without going through a dict
+def write_region_columns(path, columns, types, all_layers, region_size=REGION_SIZE):
+    if not os.path.isdir(path):
+        os.makedirs(path)
+    keys = np.stack([np.asarray(columns['x']) // region_size, np.asarray(columns['y']) // region_size], axis=1)
+    regions, region_ids = np.unique(keys, axis=0, return_inverse=True)
+    region_ids = region_ids.reshape(-1)
+    order = np.argsort(region_ids, kind='stable')
+    starts = np.searchsorted(region_ids[order], np.arange(len(regions) + 1))
+    for i, key in enumerate(regions.tolist()):
+        rows = order[starts[i]:starts[i + 1]]
+        map_format.write_columns(region_file(path, key), {name: np.asarray(columns[name])[rows] for name, dtype in map_format.COLUMNS}, types, all_layers)
+    xs = np.asarray(columns['x'])
+    ys = np.asarray(columns['y'])
+    write_index(path, region_size, all_layers, [int(xs.min()), int(xs.max()), int(ys.min()), int(ys.max())], regions.tolist())
+
+def write_index(path, region_size, all_layers, bounds, regions):
+    index = {
+        'region_size': region_size,
+        'all_layers': all_layers,
+        'bounds': bounds,
+        'regions': regions,
+    }
+    f = open(os.path.join(path, INDEX_FILE), 'w')
+    f.write(json.dumps(index))
+    f.close()
+
+def read_region(path, key):
+    return map_format.read_binary(region_file(path, key))[0]
+
+# TileMap over a region directory. base only ever holds the loaded regions: regions near the camera
+# are read on a background thread, a lookup in a region that isn't in yet reads it on the spot, and
+# the least recently needed regions beyond region_budget are dropped again. Edits live in the
+# overlay as usual, so they survive their region being evicted.
+class RegionMap(TileMap):
+    def __init__(self, tile_size, view_size, spritesheets=None, spritesheets_data=None, region_budget=REGION_BUDGET):
+        TileMap.__init__(self, tile_size, view_size, spritesheets, spritesheets_data)
+        self.region_budget = region_budget
+        self.path = None
+        self.region_size = REGION_SIZE
+        self.region_index = set()
+        # loaded region key -> its positions, least recently needed first
+        self.regions = OrderedDict()
+        self.pending = set()
+        # bumped per load_map so the thread's results for an old map are thrown away
+        self.generation = 0
+        self.requests = queue.Queue()
+        self.results = queue.Queue()
+        self.loader = None
+
+    def load_map(self, path, prefer_binary=True):
+        if (path[0] != 'C') and (not os.path.isabs(path)) and (not os.path.isdir(path)):
+            path = 'data/maps/' + path
+        if not os.path.isdir(path):
+            path = region_path(path)
+        if path == self.map_key:
+            self.reset()
+            return
+        f = open(os.path.join(path, INDEX_FILE), 'r')
+        index = json.loads(f.read())
+        f.close()
+        self.tile_map = {}
+        self.path = path
+        self.region_size = index['region_size']
+        self.region_index = set(tuple(key) for key in index['regions'])
+        self.regions = OrderedDict()
+        self.pending = set()
+        self.generation += 1
+        self.base_layers = index['all_layers']
+        self.all_layers = list(self.base_layers)
+        self.left, self.right, self.top, self.bottom = index['bounds']
+        self.map_key = path
+        if self.loader is None:
+            self.loader = threading.Thread(target=self.load_regions, daemon=True)
+            self.loader.start()
+
+    # loader thread: only reads files, everything else happens on the main thread in apply_region
+    def load_regions(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            path, key, generation = request
+            try:
+                tiles = read_region(path, key)
+            except (OSError, ValueError):
+                tiles = {}
+            self.results.put((key, generation, tiles))
+
+    def stop(self):
+        if self.loader is not None:
+            self.requests.put(None)
+            self.loader.join()
+            self.loader = None
+
+    def region_of(self, pos):
+        return (pos[0] // self.region_size, pos[1] // self.region_size)
+
+    def apply_region(self, key, tiles):
+        self.regions[key] = list(tiles)
+        self.pending.discard(key)
+        self.base.update(tiles)
+        for mask, positions in self.flagged.items():
+            positions.update([pos for pos in tiles if any(tile_flags(tile) & mask for tile in tiles[pos].values())])
+        self.region_changed(key)
+
+    def evict_region(self, key):
+        positions = self.regions.pop(key)
+        for pos in positions:
+            del self.base[pos]
+        for flagged in self.flagged.values():
+            flagged.difference_update(positions)
+        self.region_changed(key)
+
+    # chunks and visible sets that saw the region before it was (un)loaded
+    def region_changed(self, key):
+        chunk_range_x = range(key[0] * self.region_size // CHUNK_SIZE, ((key[0] + 1) * self.region_size - 1) // CHUNK_SIZE + 1)
+        chunk_range_y = range(key[1] * self.region_size // CHUNK_SIZE, ((key[1] + 1) * self.region_size - 1) // CHUNK_SIZE + 1)
+        for chunk_y in chunk_range_y:
+            for chunk_x in chunk_range_x:
+                self.tile_chunks.pop((chunk_x, chunk_y), None)
+                for layer in self.all_layers:
+                    self.chunks.pop((layer, chunk_x, chunk_y), None)
+        self.visible_trackers = {}
+        self.version += 1
+
+    # blocking load for lookups that land in a region the thread hasn't delivered yet
+    def require(self, pos):
+        key = self.region_of(pos)
+        if (key not in self.regions) and (key in self.region_index):
+            self.apply_region(key, read_region(self.path, key))
+
+    # takes in finished loads, requests the regions around the view and evicts past the budget
+    def stream(self, pos):
+        while True:
+            try:
+                key, generation, tiles = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if (generation == self.generation) and (key not in self.regions):
+                self.apply_region(key, tiles)
+            elif generation == self.generation:
+                self.pending.discard(key)
+
+        window = self.visible_window(pos)
+        x0, y0 = self.region_of((window[0] - STREAM_MARGIN, window[1] - STREAM_MARGIN))
+        x1, y1 = self.region_of((window[0] + window[2] + STREAM_MARGIN, window[1] + window[3] + STREAM_MARGIN))
+        needed = set()
+        for y in range(y0, y1 + 1):
+            for x in range(x0, x1 + 1):
+                key = (x, y)
+                if key not in self.region_index:
+                    continue
+                needed.add(key)
+                if key in self.regions:
+                    self.regions.move_to_end(key)
+                elif key not in self.pending:
+                    self.pending.add(key)
+                    self.requests.put((self.path, key, self.generation))
+
+        for key in [key for key in self.regions if key not in needed][:max(len(self.regions) - self.region_budget, 0)]:
+            self.evict_region(key)
+
+    def tiles_at(self, pos):
+        self.require(pos)
+        return TileMap.tiles_at(self, pos)
+
+    def edit(self, pos):
+        self.require(pos)
+        return TileMap.edit(self, pos)
+
+    def records_at(self, pos):
+        self.require(pos)
+        return TileMap.records_at(self, pos)
+
+    # every region the chunk overlaps has to be in before its tiles are pulled out
+    def chunk_tiles(self, chunk):
+        first = self.region_of((chunk[0] * CHUNK_SIZE, chunk[1] * CHUNK_SIZE))
+        last = self.region_of(((chunk[0] + 1) * CHUNK_SIZE - 1, (chunk[1] + 1) * CHUNK_SIZE - 1))
+        for y in range(first[1], last[1] + 1):
+            for x in range(first[0], last[0] + 1):
+                self.require((x * self.region_size, y * self.region_size))
+        return TileMap.chunk_tiles(self, chunk)
+
+    def get_visible_records(self, pos, mask=None):
+        self.stream(pos)
+        return TileMap.get_visible_records(self, pos, mask)
+
+    # looked up tile by tile; a collision grid would need the whole map in memory
+    def query_rect(self, rect):
+        if (rect.width <= 0) or (rect.height <= 0):
+            return []
+        rects = []
+        for y in range(rect.top // self.tile_size[1], (rect.bottom - 1) // self.tile_size[1] + 1):
+            for x in range(rect.left // self.tile_size[0], (rect.right - 1) // self.tile_size[0] + 1):
+                tiles = self.tiles_at((x, y))
+                if tiles and any(tile[0] in COLLISION_TYPES for tile in tiles.values()):
+                    rects.append(pygame.Rect(x * self.tile_size[0], y * self.tile_size[1], self.tile_size[0], self.tile_size[1]))
+        return rects
+
+# python -m scripts.region_map data/maps/level_3.json [region size]
+if __name__ == '__main__':
+    region_size = int(sys.argv[2]) if len(sys.argv) > 2 else REGION_SIZE
+    json_path = sys.argv[1]
+    level_map = TileMap((1, 1), (1, 1))
+    level_map.tile_map, all_layers, bounds = level_map.read_level(json_path)
+    write_regions(region_path(json_path), level_map.tile_map, all_layers, region_size)
+    print(json_path, '->', region_path(json_path))
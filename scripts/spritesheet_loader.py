@@ -1,45 +1,44 @@
 import pygame, os, json
+import numpy as np
 from .core_funcs import *
+from . import atlas
 
 COLORKEY = (0, 0, 0)
 
+# marker colors: yellow at x=0 starts a row, magenta is a tile's top left corner and cyan ends
+# its width (on the same row) and height (in the same column)
+ROW_MARKER = (255, 255, 0)
+TILE_MARKER = (255, 0, 255)
+END_MARKER = (0, 255, 255)
+
+def marker_mask(pixels, color):
+    return (pixels[:, :, 0] == color[0]) & (pixels[:, :, 1] == color[1]) & (pixels[:, :, 2] == color[2])
+
 def load_spritesheet(spritesheet):
-    rows = []
+    # surfarray layout is (x, y, rgb)
+    pixels = pygame.surfarray.array3d(spritesheet)
+    tiles = marker_mask(pixels, TILE_MARKER)
+    ends = marker_mask(pixels, END_MARKER)
+    rows = np.flatnonzero(marker_mask(pixels[:1], ROW_MARKER)[0]).tolist()
+    bounds = spritesheet.get_rect()
     spritesheet_dat = []
-    for y in range(spritesheet.get_height()):
-        c = spritesheet.get_at((0, y))
-        c = (c[0], c[1], c[2])
-        if c == (255, 255, 0):
-            rows.append(y)
     for row in rows:
         row_content = []
-        for x in range(spritesheet.get_width()):
-            c = spritesheet.get_at((x, row))
-            c = (c[0], c[1], c[2])
-            if c == (255, 0, 255): # found tile
-                x2 = 0
-                while True:
-                    x2 += 1
-                    c = spritesheet.get_at((x + x2, row))
-                    c = (c[0], c[1], c[2])
-                    if c == (0, 255, 255):
-                        width = x2
-                        break
-                y2 = 0
-                while True:
-                    y2 += 1
-                    c = spritesheet.get_at((x, row + y2))
-                    c = (c[0], c[1], c[2])
-                    if c == (0, 255, 255):
-                        height = y2
-                        break
-                img = clip(spritesheet, x + 1, row + 1, x2 - 1, y2 - 1)
-                img.set_colorkey(COLORKEY)
-                row_content.append(img)
+        for x in np.flatnonzero(tiles[:, row]).tolist():
+            x2 = int(np.argmax(ends[x + 1:, row])) + 1
+            y2 = int(np.argmax(ends[x, row + 1:])) + 1
+            if (not ends[x + x2, row]) or (not ends[x, row + y2]):
+                raise ValueError('tile at ' + str((x, row)) + ' has no end marker')
+            img = spritesheet.subsurface(pygame.Rect(x + 1, row + 1, x2 - 1, y2 - 1).clip(bounds)).copy()
+            img.set_colorkey(COLORKEY)
+            row_content.append(img)
         spritesheet_dat.append(row_content)
     return spritesheet_dat
 
 def load_spritesheets(path):
+    baked = atlas.spritesheets(path)
+    if baked:
+        return baked
     spritesheet_list = os.listdir(path)
     spritesheets = {}
     spritesheets_data = {}
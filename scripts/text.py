@@ -1,70 +1,182 @@
 #!/usr/bin/python3.4
 import pygame, sys
+from collections import OrderedDict
+
+import numpy as np
+
 from .core_funcs import *
-from .clip import clip
+from . import atlas
+
+# upper bound on shared Font instances; animated glow colors churn through the tail
+FONT_CACHE_SIZE = 64
+
+font_cache = OrderedDict()
+
+# rendered string surfaces keyed by (text, line_width, color, path)
+TEXT_CACHE_SIZE = 256
+
+text_cache = OrderedDict()
+text_cache_stats = {'hits': 0, 'misses': 0}
+
+# one decoded, sliced atlas per font path plus palette-swapped copies of it per color
+COLOR_STEP = 4
+TINT_CACHE_SIZE = 64
+
+base_fonts = {}
+tinted_fonts = OrderedDict()
+
+# decodes and slices a font image once into an 8-bit atlas whose palette entry 1 is the glyph color
+def load_base_font(path):
+    if path in base_fonts:
+        return base_fonts[path]
+    src_img = atlas.load_image(path)
+    font_img = pygame.Surface(src_img.get_size(), 0, 8)
+    font_img.set_palette([(0, 0, 0), (255, 0, 0), (127, 127, 127)] + [(0, 0, 0)] * 253)
+    font_img.blit(src_img, (0, 0))
+    last_x = 0
+    glyph_rects = []
+    letter_spacing = []
+    # glyphs are separated by gray (palette entry 2) pixels along the top row
+    for x in np.flatnonzero(pygame.surfarray.array2d(font_img)[:, 0] == 2).tolist():
+        glyph_rects.append(pygame.Rect(last_x, 0, x - last_x, font_img.get_height()))
+        letter_spacing.append(x - last_x)
+        last_x = x + 1
+    base_fonts[path] = (font_img, glyph_rects, letter_spacing)
+    return base_fonts[path]
+
+# snaps a color to COLOR_STEP so near-identical glow colors share one tinted atlas
+def quantize_color(color):
+    new_color = tuple([min(255, int(round(v / COLOR_STEP)) * COLOR_STEP) for v in color[:3]])
+    if new_color == (0, 0, 0):
+        return tuple(color[:3])
+    return new_color
 
 def load_font_img(path, font_color):
-    fg_color = (255, 0, 0)
     bg_color = (0, 0, 0)
-    font_img = pygame.image.load(path).convert()
-    font_img = swap_color(font_img, fg_color, font_color)
-    last_x = 0
+    font_color = quantize_color(font_color)
+    key = (path, font_color)
+    if key in tinted_fonts:
+        tinted_fonts.move_to_end(key)
+        return tinted_fonts[key]
+    base_img, glyph_rects, letter_spacing = load_base_font(path)
+    font_img = base_img.copy()
+    font_img.set_palette_at(1, font_color)
     letters = []
-    letter_spacing = []
-    for x in range(font_img.get_width()):
-        if font_img.get_at((x, 0))[0] == 127:
-            letters.append(clip(font_img, last_x, 0, x - last_x, font_img.get_height()))
-            letter_spacing.append(x - last_x)
-            last_x = x + 1
-        x += 1
-    for letter in letters:
+    for rect in glyph_rects:
+        letter = font_img.subsurface(rect)
         letter.set_colorkey(bg_color)
-    return letters, letter_spacing, font_img.get_height()
+        letters.append(letter)
+    tinted_fonts[key] = (letters, letter_spacing, font_img.get_height())
+    if len(tinted_fonts) > TINT_CACHE_SIZE:
+        tinted_fonts.popitem(last=False)
+    return tinted_fonts[key]
 
 class Font():
     def __init__(self, path, color):
+        self.path = path
+        self.color = quantize_color(color)
         self.letters, self.letter_spacing, self.line_height = load_font_img(path, color)
         self.font_order = ['A','B','C','D','E','F','G','H','I','J','K','L','M','N','O','P','Q','R','S','T','U','V','W','X','Y','Z','a','b','c','d','e','f','g','h','i','j','k','l','m','n','o','p','q','r','s','t','u','v','w','x','y','z','.','-',',',':','+','\'','!','?','0','1','2','3','4','5','6','7','8','9','(',')','/','_','=','\\','[',']','*','"','<','>',';']
         self.space_width = self.letter_spacing[0]
         self.base_spacing = 1
         self.line_spacing = 2
+        # char -> (glyph surface, advance) so layout never searches font_order
+        self.glyphs = {}
+        for i, char in enumerate(self.font_order):
+            self.glyphs[char] = (self.letters[i], self.letter_spacing[i] + self.base_spacing)
+        self.advances = {char: glyph[1] for char, glyph in self.glyphs.items()}
+        self.advances[' '] = self.space_width + self.base_spacing
 
     def width(self, text):
-        text_width = 0
+        advances = self.advances
+        return sum([advances[char] for char in text if char in advances])
+
+    # breaks text at the space before the first word that ends past line_width, measuring each
+    # space from the start of the line the previous break began (same rule render always used)
+    def wrap(self, text, line_width):
+        advances = self.advances
+        spaces = []
+        x = 0
+        for i, char in enumerate(text):
+            if char == ' ':
+                spaces.append((x, i))
+            if char in advances:
+                x += advances[char]
+        line_offset = 0
+        for i, space in enumerate(spaces):
+            if (space[0] - line_offset) > line_width:
+                line_offset = spaces[i - 1][0]
+                if i != 0:
+                    text = text[:spaces[i - 1][1]] + '\n' + text[spaces[i - 1][1] + 1:]
+        return text
+
+    # single pass over text producing (glyph, pos) pairs ready for Surface.blits
+    def layout(self, text, loc=(0, 0), line_width=0):
+        if line_width != 0:
+            text = self.wrap(text, line_width)
+        glyphs = self.glyphs
+        space_advance = self.space_width + self.base_spacing
+        line_advance = self.line_height + self.line_spacing
+        blits = []
+        x = loc[0]
+        y = loc[1]
         for char in text:
             if char == ' ':
-                text_width += self.space_width + self.base_spacing
+                x += space_advance
             elif char == '\n':
-                # Skip newline characters
-                pass
-            else:
-                text_width += self.letter_spacing[self.font_order.index(char)] + self.base_spacing
-        return text_width
+                x = loc[0]
+                y += line_advance
+            elif char in glyphs:
+                glyph = glyphs[char]
+                blits.append((glyph[0], (x, y)))
+                x += glyph[1]
+        return blits
 
     def render(self, text, surf, loc, line_width=0):
-        x_offset = 0
-        y_offset = 0
-        if line_width != 0:
-            spaces = []
-            x = 0
-            for i, char in enumerate(text):
-                if char == ' ':
-                    spaces.append((x, i))
-                    x += self.space_width + self.base_spacing
-                elif char != '\n' and char in self.font_order:
-                    x += self.letter_spacing[self.font_order.index(char)] + self.base_spacing
-            line_offset = 0
-            for i, space in enumerate(spaces):
-                if (space[0] - line_offset) > line_width:
-                    line_offset += spaces[i - 1][0] - line_offset
-                    if i != 0:
-                        text = text[:spaces[i - 1][1]] + '\n' + text[spaces[i - 1][1] + 1:]
-        for char in text:
-            if char not in ['\n', ' ']:
-                surf.blit(self.letters[self.font_order.index(char)], (loc[0] + x_offset, loc[1] + y_offset))
-                x_offset += self.letter_spacing[self.font_order.index(char)] + self.base_spacing
-            elif char == ' ':
-                x_offset += self.space_width + self.base_spacing
-            else:
-                y_offset += self.line_spacing + self.line_height
-                x_offset = 0
\ No newline at end of file
+        surf.blits(self.layout(text, loc, line_width), doreturn=False)
+
+    # renders text once onto its own colorkeyed surface
+    def render_surf(self, text, line_width=0):
+        blits = self.layout(text, (0, 0), line_width)
+        width = max([pos[0] + img.get_width() for img, pos in blits], default=1)
+        height = max([pos[1] for img, pos in blits], default=0) + self.line_height
+        surf = pygame.Surface((width, height))
+        surf.blits(blits, doreturn=False)
+        surf.set_colorkey((0, 0, 0))
+        return surf
+
+    # same output as render() but static strings cost a single blit
+    def render_cached(self, text, surf, loc, line_width=0):
+        key = (text, line_width, self.color, self.path)
+        text_surf = text_cache.get(key)
+        if text_surf is not None:
+            text_cache.move_to_end(key)
+            text_cache_stats['hits'] += 1
+        else:
+            text_cache_stats['misses'] += 1
+            text_surf = self.render_surf(text, line_width)
+            text_cache[key] = text_surf
+            if len(text_cache) > TEXT_CACHE_SIZE:
+                text_cache.popitem(last=False)
+        surf.blit(text_surf, loc)
+
+# shared, pre-sliced fonts keyed by (path, color) so render paths never reload the atlas
+def get_font(path, color):
+    key = (path, quantize_color(color))
+    font = font_cache.get(key)
+    if font:
+        font_cache.move_to_end(key)
+        return font
+    font = Font(path, color)
+    font_cache[key] = font
+    if len(font_cache) > FONT_CACHE_SIZE:
+        font_cache.popitem(last=False)
+    return font
+
+def text_cache_info():
+    return {
+        'hits': text_cache_stats['hits'],
+        'misses': text_cache_stats['misses'],
+        'size': len(text_cache),
+        'max_size': TEXT_CACHE_SIZE,
+    }
@@ -0,0 +1,193 @@
+from collections.abc import Mapping
+
+import numpy as np
+
+# marks a layer with no tile at a position in TileGrid.ids
+EMPTY = 0xFFFF
+
+# (type, column, row) tiles interned to small ints, shared by every map
+tile_ids = {}
+tile_table = []
+
+def tile_id(tile):
+    key = (tile[0], tile[1], tile[2])
+    if key not in tile_ids:
+        tile_ids[key] = len(tile_table)
+        tile_table.append(key)
+    return tile_ids[key]
+
+# tiles are stored in BLOCK_SIZE x BLOCK_SIZE squares (the same as tile_map.CHUNK_SIZE), and only
+# the squares holding a position get one, so stray tiles far apart don't cost their bounding box
+BLOCK_SIZE = 16
+
+# a level's tiles as uint16 tile id blocks, ids[block, layer index, x, y] with x, y inside the block.
+# Reads like the {(x, y): {layer: [type, column, row]}} dict it replaces; every lookup hands out
+# fresh lists, so the grid itself is never mutated (TileMap keeps edits in its overlay).
+class TileGrid(Mapping):
+    def __init__(self, origin, size, layers, blocks=()):
+        # bounding box of the positions, in tiles
+        self.origin = tuple(origin)
+        self.size = tuple(size)
+        self.layers = list(layers)
+        self.layer_index = {layer: i for i, layer in enumerate(self.layers)}
+        # (block_x, block_y) -> index into ids/present, and the world tile position of each block's corner
+        self.blocks = {block: i for i, block in enumerate(blocks)}
+        self.block_pos = np.array(list(blocks), dtype=np.int64).reshape(-1, 2) * BLOCK_SIZE
+        self.ids = np.full((len(self.blocks), len(self.layers), BLOCK_SIZE, BLOCK_SIZE), EMPTY, dtype=np.uint16)
+        # positions in the map, including the ones the editor left with no layers
+        self.present = np.zeros((len(self.blocks), BLOCK_SIZE, BLOCK_SIZE), dtype=np.bool_)
+        self.count = 0
+        self.tile_count = 0
+
+    # x, y, layer, tile id arrays, one entry per tile; tile id EMPTY only marks the position
+    @classmethod
+    def from_arrays(cls, xs, ys, layers, ids):
+        xs = np.asarray(xs, dtype=np.int64)
+        ys = np.asarray(ys, dtype=np.int64)
+        layers = np.asarray(layers, dtype=np.int32)
+        ids = np.asarray(ids, dtype=np.uint16)
+        if not len(xs):
+            return cls((0, 0), (0, 0), [])
+        origin = (int(xs.min()), int(ys.min()))
+        size = (int(xs.max()) - origin[0] + 1, int(ys.max()) - origin[1] + 1)
+        filled = ids != EMPTY
+        # block coordinates packed into one int64 so finding the occupied blocks is a plain 1-d unique
+        block_xs = xs // BLOCK_SIZE
+        block_ys = ys // BLOCK_SIZE
+        first_x = int(block_xs.min())
+        first_y = int(block_ys.min())
+        span_y = int(block_ys.max()) - first_y + 1
+        keys, block_of = np.unique((block_xs - first_x) * span_y + (block_ys - first_y), return_inverse=True)
+        block_of = block_of.reshape(-1)
+        blocks = list(zip((keys // span_y + first_x).tolist(), (keys % span_y + first_y).tolist()))
+        grid = cls(origin, size, sorted(set(layers[filled].tolist())), blocks)
+        grid.present[block_of, xs % BLOCK_SIZE, ys % BLOCK_SIZE] = True
+        if grid.layers:
+            layer_rows = np.searchsorted(np.array(grid.layers), layers[filled])
+            grid.ids[block_of[filled], layer_rows, xs[filled] % BLOCK_SIZE, ys[filled] % BLOCK_SIZE] = ids[filled]
+        grid.count = int(grid.present.sum())
+        grid.tile_count = int((grid.ids != EMPTY).sum())
+        return grid
+
+    # map_format columns (type ids indexing types) -> TileGrid, interning each distinct tile once
+    @classmethod
+    def from_columns(cls, columns, types):
+        type_col = np.asarray(columns['type'])
+        filled = type_col != EMPTY
+        ids = np.full(len(type_col), EMPTY, dtype=np.uint16)
+        if filled.any():
+            # type, column and row packed into one int64 so the unique pass is a plain 1-d sort
+            keys = (type_col[filled].astype(np.int64) << 32) | ((np.asarray(columns['column'])[filled].astype(np.int64) & 0xFFFF) << 16) | (np.asarray(columns['row'])[filled].astype(np.int64) & 0xFFFF)
+            unique, inverse = np.unique(keys, return_inverse=True)
+            unique_types = (unique >> 32).tolist()
+            unique_columns = ((unique >> 16) & 0xFFFF).astype(np.uint16).view(np.int16).tolist()
+            unique_rows = (unique & 0xFFFF).astype(np.uint16).view(np.int16).tolist()
+            table = np.array([tile_id((types[tile[0]], tile[1], tile[2])) for tile in zip(unique_types, unique_columns, unique_rows)], dtype=np.uint16)
+            ids[filled] = table[inverse.reshape(-1)]
+        return cls.from_arrays(columns['x'], columns['y'], columns['layer'], ids)
+
+    # from the tuplified dict
+    @classmethod
+    def from_dict(cls, tile_map):
+        xs, ys, layers, ids = [], [], [], []
+        for pos, tiles in tile_map.items():
+            if not tiles:
+                xs.append(pos[0])
+                ys.append(pos[1])
+                layers.append(0)
+                ids.append(EMPTY)
+            for layer, tile in tiles.items():
+                xs.append(pos[0])
+                ys.append(pos[1])
+                layers.append(layer)
+                ids.append(tile_id(tile))
+        return cls.from_arrays(xs, ys, layers, ids)
+
+    # (block index, x, y) of a position in the map, or None
+    def cell(self, pos):
+        block = self.blocks.get((pos[0] // BLOCK_SIZE, pos[1] // BLOCK_SIZE))
+        if block is None:
+            return None
+        x = pos[0] % BLOCK_SIZE
+        y = pos[1] % BLOCK_SIZE
+        if self.present[block, x, y]:
+            return block, x, y
+        return None
+
+    def __contains__(self, pos):
+        return self.cell(pos) is not None
+
+    # (layer, tile id) of every tile at a cell, in layer order
+    def cell_ids(self, cell):
+        return [(self.layers[i], tile) for i, tile in enumerate(self.ids[cell[0], :, cell[1], cell[2]].tolist()) if tile != EMPTY]
+
+    def tiles_at(self, cell):
+        return {layer: list(tile_table[tile]) for layer, tile in self.cell_ids(cell)}
+
+    def __getitem__(self, pos):
+        cell = self.cell(pos)
+        if cell is None:
+            raise KeyError(pos)
+        return self.tiles_at(cell)
+
+    def get(self, pos, default=None):
+        cell = self.cell(pos)
+        if cell is None:
+            return default
+        return self.tiles_at(cell)
+
+    # the (type, column, row) tuple at pos/layer, or None
+    def tile(self, pos, layer):
+        cell = self.cell(pos)
+        if (cell is None) or (layer not in self.layer_index):
+            return None
+        tile = int(self.ids[cell[0], self.layer_index[layer], cell[1], cell[2]])
+        return tile_table[tile] if tile != EMPTY else None
+
+    # world x, y arrays of the cells selected by a [block, x, y] bool array
+    def world_positions(self, selected):
+        blocks, xs, ys = np.nonzero(selected)
+        return self.block_pos[blocks, 0] + xs, self.block_pos[blocks, 1] + ys
+
+    # positions row by row
+    def __iter__(self):
+        xs, ys = self.world_positions(self.present)
+        order = np.lexsort((xs, ys))
+        for x, y in zip(xs[order].tolist(), ys[order].tolist()):
+            yield (x, y)
+
+    def __len__(self):
+        return self.count
+
+    # world x, y arrays of the positions holding any of the given tile ids on any layer
+    def positions(self, ids):
+        if not self.layers:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        return self.world_positions(np.isin(self.ids, np.array(sorted(ids), dtype=np.uint16)).any(axis=1))
+
+    # world x, y, layer and tile id arrays of the tiles with x0 <= x < x1 and y0 <= y < y1,
+    # ordered by layer, then row by row
+    def tiles_in(self, x0, y0, x1, y1):
+        found = []
+        for block_y in range(y0 // BLOCK_SIZE, (y1 - 1) // BLOCK_SIZE + 1):
+            for block_x in range(x0 // BLOCK_SIZE, (x1 - 1) // BLOCK_SIZE + 1):
+                block = self.blocks.get((block_x, block_y))
+                if block is None:
+                    continue
+                ids = self.ids[block].transpose(0, 2, 1)
+                rows, ys, xs = np.nonzero(ids != EMPTY)
+                tiles = ids[rows, ys, xs]
+                xs = xs + block_x * BLOCK_SIZE
+                ys = ys + block_y * BLOCK_SIZE
+                inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+                found.append((xs[inside], ys[inside], rows[inside], tiles[inside]))
+        if not found:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.uint16)
+        xs, ys, rows, tiles = [np.concatenate(column) for column in zip(*found)]
+        if len(found) > 1:
+            order = np.lexsort((xs, ys, rows))
+            xs, ys, rows, tiles = xs[order], ys[order], rows[order], tiles[order]
+        return xs, ys, np.array(self.layers, dtype=np.int64)[rows], tiles
+
+    def nbytes(self):
+        return self.ids.nbytes + self.present.nbytes + self.block_pos.nbytes
@@ -1,112 +1,618 @@
+import os
 import json
 import math
+import bisect
+from collections import OrderedDict
 
-def tuple_to_str(tp):
-    return ';'.join([str(v) for v in tp])
+import numpy as np
+import pygame
 
-def str_to_tuple(s):
-    return tuple([int(v) for v in s.split(';')])
+from .spritesheet_loader import get_img
+from . import map_format
+from .map_format import tuple_to_str
+from .tile_grid import TileGrid, tile_table, tile_id
+
+# static layers are baked into surfaces of CHUNK_SIZE x CHUNK_SIZE tiles
+CHUNK_SIZE = 16
+# tile types the game draws itself every frame, so they're left out of the chunks
+DYNAMIC_TYPES = {'mana'}
+# tile types that block movement, on any layer
+COLLISION_TYPES = {'ground'}
+# merged collision rects are bucketed on a grid of this many tiles
+COLLISION_BUCKET_SIZE = 8
+
+# behaviour flags of compiled tile records
+SOLID = 1
+EMITTER = 2
+PICKUP = 4
+# flags by tile type, or by (type, variant) where only one variant behaves differently
+TILE_FLAGS = {
+    'ground': SOLID,
+    'torches': EMITTER,
+    ('decorations', 0): EMITTER,
+    'mana': PICKUP,
+}
+
+# tile type names interned to small ints, shared by every map
+type_ids = {}
+type_names = []
+
+# pristine parsed levels keyed by (source file, mtime) so reloading after a death skips the disk
+MAP_CACHE_SIZE = 8
+
+map_cache = OrderedDict()
+map_cache_stats = {'hits': 0, 'misses': 0}
+
+def type_id(name):
+    if name not in type_ids:
+        type_ids[name] = len(type_names)
+        type_names.append(name)
+    return type_ids[name]
+
+def tile_flags(tile):
+    return TILE_FLAGS.get((tile[0], tile[1]), TILE_FLAGS.get(tile[0], 0))
 
 class TileMap:
-    def __init__(self, tile_size, view_size):
+    def __init__(self, tile_size, view_size, spritesheets=None, spritesheets_data=None):
         self.tile_size = tuple(tile_size)
         self.view_size = tuple(view_size)
-        self.tile_map = {}
+        # base is the loaded level and is never mutated (it's shared with map_cache); loaded levels
+        # are a TileGrid, anything assigned to tile_map stays a plain dict. Edits go to overlay as
+        # whole copied positions, None marking a removed position
+        self.base = {}
+        self.overlay = {}
+        self.base_layers = []
         self.all_layers = []
+        self.spritesheets = spritesheets
+        self.spritesheets_data = spritesheets_data or {}
+        # (layer, chunk_x, chunk_y) -> (surface, world pos) or None for empty chunks
+        self.chunks = {}
+        # chunks invalidated since the last reset; the rest stay valid across resets
+        self.touched_chunks = set()
+        self.map_key = None
+        # occupancy of collision tiles as a bool [x, y] grid from grid_origin; base_grid is built
+        # lazily from base and copied into grid on every reset
+        self.base_grid = None
+        self.grid = None
+        self.grid_origin = (0, 0)
+        # greedy-meshed collision rects and their bucket index, for base and for the current grid
+        self.base_mesh = None
+        self.mesh = None
+        self.grid_edited = False
+        # base tiles are pulled out per chunk on first use, (chunk_x, chunk_y) -> compile_chunk
+        # arrays with only the most recently used kept; tile id -> the compile_tile part every
+        # position holding it shares. Render records themselves are only built for what's drawn or asked for
+        self.tile_chunks = OrderedDict()
+        # render_layer draws the chunks under the view plus one on each side, ceil(view / chunk) + 3
+        # a side when the view isn't chunk-aligned (5x5 at 300x200 with 12px tiles); one more row and
+        # column lets the camera scroll back and forth without recompiling
+        chunk_w = CHUNK_SIZE * self.tile_size[0]
+        chunk_h = CHUNK_SIZE * self.tile_size[1]
+        self.tile_chunk_limit = (math.ceil(self.view_size[0] / chunk_w) + 4) * (math.ceil(self.view_size[1] / chunk_h) + 4)
+        self.compiled_tiles = {}
+        self.overlay_records = {}
+        # mask -> base positions holding a tile with any of those flags; see flagged_positions
+        self.flagged = {}
+        # mask -> (tile window, {pos: [(layer, record)]}, get_visible_records output, the (y, x) key
+        # of every record in output, per layer)
+        self.visible_trackers = {}
+        # bumped on every load, edit and reset so things derived from the map know to rebuild
+        self.version = 0
 
-    # used after converting from json
-    def tuplify(self):
-        new_tile_map = {}
-        for pos in self.tile_map:
-            new_tile_data = {}
-            for layer in self.tile_map[pos]:
-                new_tile_data[int(layer)] = self.tile_map[pos][layer]
-            new_tile_map[str_to_tuple(pos)] = new_tile_data
-        self.tile_map = new_tile_map
-
-    # used when converting to json
-    def stringify(self):
-        new_tile_map = {}
-        for pos in self.tile_map:
-            new_tile_map[tuple_to_str(pos)] = self.tile_map[pos]
-        self.tile_map = new_tile_map
-
-    def load_map(self, path):
-        if path[0] != 'C':
-            f = open('data/maps/' + path, 'r')
+    # merged read-only view of base + overlay
+    @property
+    def tile_map(self):
+        if not self.overlay:
+            return self.base
+        merged = dict(self.base)
+        for pos, tiles in self.overlay.items():
+            if tiles is None:
+                merged.pop(pos, None)
+            else:
+                merged[pos] = tiles
+        return merged
+
+    @tile_map.setter
+    def tile_map(self, tile_map):
+        self.base = tile_map
+        self.overlay = {}
+        self.chunks = {}
+        self.touched_chunks = set()
+        self.map_key = None
+        self.base_grid = None
+        self.grid = None
+        self.base_mesh = None
+        self.mesh = None
+        self.grid_edited = False
+        self.tile_chunks = OrderedDict()
+        self.overlay_records = {}
+        self.flagged = {}
+        self.visible_trackers = {}
+        self.version += 1
+
+    def tiles_at(self, pos):
+        if pos in self.overlay:
+            return self.overlay[pos]
+        return self.base.get(pos)
+
+    # copy-on-write: the overlay gets its own copy of a position before it's edited
+    def edit(self, pos):
+        self.overlay_records.pop(pos, None)
+        self.visible_trackers = {}
+        self.version += 1
+        tiles = self.overlay.get(pos)
+        if tiles is None:
+            tiles = dict(self.base[pos]) if (pos in self.base) and (pos not in self.overlay) else {}
+            self.overlay[pos] = tiles
+        return tiles
+
+    # drops every edit since the level was loaded
+    def reset(self):
+        self.overlay = {}
+        self.overlay_records = {}
+        self.visible_trackers = {}
+        self.version += 1
+        self.all_layers = list(self.base_layers)
+        for chunk in self.touched_chunks:
+            self.chunks.pop(chunk, None)
+        self.touched_chunks = set()
+        self.grid = None
+        self.mesh = None
+        self.grid_edited = False
+
+    # reads the .ngmap next to the json when it's at least as new, the json otherwise. Nothing is
+    # written here; the binaries come from the asset bake (see map_format.bake)
+    def load_map(self, path, prefer_binary=True):
+        if (path[0] != 'C') and (not os.path.isabs(path)):
+            path = 'data/maps/' + path
+        binary = map_format.binary_path(path)
+        if prefer_binary and os.path.exists(binary) and ((not os.path.exists(path)) or (os.path.getmtime(binary) >= os.path.getmtime(path))):
+            source = binary
         else:
-            f = open(path, 'r')
-        dat = f.read()
-        f.close()
-        json_dat = json.loads(dat)
-        self.tile_map = json_dat['map']
-        self.all_layers = json_dat['all_layers']
-        self.tuplify()
-
-        tile_x_list = [tile[0] for tile in self.tile_map]
-        tile_y_list = [tile[1] for tile in self.tile_map]
-        self.left = min(tile_x_list)
-        self.right = max(tile_x_list)
-        self.top = min(tile_y_list)
-        self.bottom = max(tile_y_list)
+            source = path
+        key = (source, os.path.getmtime(source))
+
+        level = map_cache.get(key)
+        if level is not None:
+            map_cache.move_to_end(key)
+            map_cache_stats['hits'] += 1
+        else:
+            map_cache_stats['misses'] += 1
+            level = self.read_level(source)
+            map_cache[key] = level
+            if len(map_cache) > MAP_CACHE_SIZE:
+                map_cache.popitem(last=False)
+
+        if key == self.map_key:
+            self.reset()
+            return
+        self.tile_map, self.base_layers, bounds = level
+        self.all_layers = list(self.base_layers)
+        self.left, self.right, self.top, self.bottom = bounds
+        self.map_key = key
+
+    # returns (tile_grid, all_layers, (left, right, top, bottom))
+    def read_level(self, path):
+        if path.endswith(map_format.EXTENSION):
+            columns, types, all_layers, bounds = map_format.read_columns(path)
+            return TileGrid.from_columns(columns, types), all_layers, bounds
+
+        tile_map, all_layers = map_format.read_json(path)
+        grid = TileGrid.from_dict(tile_map)
+        return grid, all_layers, (grid.origin[0], grid.origin[0] + grid.size[0] - 1, grid.origin[1], grid.origin[1] + grid.size[1] - 1)
 
     def write_map(self, path):
-        self.stringify()
+        tile_map = self.tile_map
         json_dat = {
-            'map': self.tile_map,
+            'map': {tuple_to_str(pos): tile_map[pos] for pos in tile_map},
             'all_layers': self.all_layers,
         }
-        self.tuplify()
         f = open(path, 'w')
         f.write(json.dumps(json_dat))
         f.close()
 
     def tile_collide(self, pos):
         tile_pos = (int(pos[0] // self.tile_size[0]), int(pos[1] // self.tile_size[1]))
-        if tile_pos in self.tile_map:
-            return self.tile_map[tile_pos]
+        tiles = self.tiles_at(tile_pos)
+        if tiles is not None:
+            return tiles
         else:
             return False
 
     def get_tile(self, pos, target_layer=None):
-        pos = tuple(pos)
-        if pos in self.tile_map:
-            if target_layer:
-                if target_layer in self.tile_map[pos]:
-                    return self.tile_map[pos][target_layer]
+        tiles = self.tiles_at(tuple(pos))
+        if tiles is not None:
+            if target_layer is not None:
+                if target_layer in tiles:
+                    return tiles[target_layer]
                 else:
                     return None
             else:
-                return self.tile_map[pos]
+                return tiles
         else:
             return None
 
     def add_tile(self, tile_type, pos, layer):
         pos = tuple(pos)
-        if pos in self.tile_map:
-            self.tile_map[pos][layer] = tile_type
-        else:
-            self.tile_map[pos] = {layer: tile_type}
+        tiles = self.edit(pos)
+        old_tile = tiles.get(layer)
+        tiles[layer] = tile_type
+        if (tile_type[0] not in DYNAMIC_TYPES) or (old_tile and (old_tile[0] not in DYNAMIC_TYPES)):
+            self.invalidate(pos, layer)
+        if (tile_type[0] in COLLISION_TYPES) or (old_tile and (old_tile[0] in COLLISION_TYPES)):
+            self.update_grid(pos)
         if layer not in self.all_layers:
             self.all_layers.append(layer)
             self.all_layers.sort()
 
     def remove_tile(self, pos, layer=None):
         pos = tuple(pos)
-        if pos in self.tile_map:
-            if layer:
-                if layer in self.tile_map[pos]:
-                    del self.tile_map[pos][layer]
+        tiles = self.tiles_at(pos)
+        if tiles is not None:
+            if layer is not None:
+                if layer in tiles:
+                    if tiles[layer][0] not in DYNAMIC_TYPES:
+                        self.invalidate(pos, layer)
+                    del self.edit(pos)[layer]
             else:
-                del self.tile_map[pos]
+                for tile_layer in tiles:
+                    if tiles[tile_layer][0] not in DYNAMIC_TYPES:
+                        self.invalidate(pos, tile_layer)
+                self.overlay[pos] = None
+                self.overlay_records.pop(pos, None)
+                self.visible_trackers = {}
+                self.version += 1
+            self.update_grid(pos)
 
-    def get_visible(self, pos):
-        layers = {l : [] for l in self.all_layers}
-        for y in range(math.ceil(self.view_size[1] / self.tile_size[1]) + 3):
-            for x in range(math.ceil(self.view_size[0] / self.tile_size[0]) + 4):
-                tile_pos = (x - 1 + int(round(pos[0] / self.tile_size[0] - 0.5, 0)), y - 2 + int(round(pos[1] / self.tile_size[1] - 0.5, 0)))
-                if tile_pos in self.tile_map:
-                    for tile in self.tile_map[tile_pos]:
-                        layers[tile].append([(tile_pos[0] * self.tile_size[0], tile_pos[1] * self.tile_size[1]), self.tile_map[tile_pos][tile]])
-        output = [layers[l] for l in self.all_layers]
+    def build_grid(self, tile_map):
+        if isinstance(tile_map, TileGrid):
+            xs, ys = tile_map.positions([i for i, tile in enumerate(tile_table) if tile[0] in COLLISION_TYPES])
+            if not len(xs):
+                return np.zeros((0, 0), dtype=np.bool_), (0, 0)
+            origin = (int(xs.min()), int(ys.min()))
+            grid = np.zeros((int(xs.max()) - origin[0] + 1, int(ys.max()) - origin[1] + 1), dtype=np.bool_)
+            grid[xs - origin[0], ys - origin[1]] = True
+            return grid, origin
+        solid = [pos for pos in tile_map if any(tile[0] in COLLISION_TYPES for tile in tile_map[pos].values())]
+        if not solid:
+            return np.zeros((0, 0), dtype=np.bool_), (0, 0)
+        xs = [pos[0] for pos in solid]
+        ys = [pos[1] for pos in solid]
+        origin = (min(xs), min(ys))
+        grid = np.zeros((max(xs) - origin[0] + 1, max(ys) - origin[1] + 1), dtype=np.bool_)
+        grid[np.array(xs) - origin[0], np.array(ys) - origin[1]] = True
+        return grid, origin
+
+    def get_grid(self):
+        if self.grid is None:
+            if self.base_grid is None:
+                self.base_grid = self.build_grid(self.base)
+            self.grid = self.base_grid[0].copy()
+            self.grid_origin = self.base_grid[1]
+            # edits made before the grid was first needed
+            for pos in self.overlay:
+                self.update_grid(pos)
+        return self.grid
+
+    def update_grid(self, pos):
+        if self.grid is None:
+            return
+        tiles = self.tiles_at(pos) or {}
+        solid = any(tile[0] in COLLISION_TYPES for tile in tiles.values())
+        x = pos[0] - self.grid_origin[0]
+        y = pos[1] - self.grid_origin[1]
+        if (0 <= x < self.grid.shape[0]) and (0 <= y < self.grid.shape[1]):
+            if self.grid[x, y] != solid:
+                self.grid[x, y] = solid
+                self.grid_edited = True
+                self.mesh = None
+        elif solid:
+            self.grid, self.grid_origin = self.build_grid(self.tile_map)
+            self.grid_edited = True
+            self.mesh = None
+
+    # merges solid cells into maximal rects: run right along a row, then grow down while the whole run is solid
+    def build_mesh(self, grid, origin):
+        free = grid.copy()
+        rects = []
+        for y in range(grid.shape[1]):
+            for x in np.flatnonzero(free[:, y]).tolist():
+                if not free[x, y]:
+                    continue
+                w = 1
+                while (x + w < grid.shape[0]) and free[x + w, y]:
+                    w += 1
+                h = 1
+                while (y + h < grid.shape[1]) and free[x:x + w, y + h].all():
+                    h += 1
+                free[x:x + w, y:y + h] = False
+                rects.append(pygame.Rect((origin[0] + x) * self.tile_size[0], (origin[1] + y) * self.tile_size[1], w * self.tile_size[0], h * self.tile_size[1]))
+        bucket_w = COLLISION_BUCKET_SIZE * self.tile_size[0]
+        bucket_h = COLLISION_BUCKET_SIZE * self.tile_size[1]
+        buckets = {}
+        for i, rect in enumerate(rects):
+            for bucket_y in range(rect.top // bucket_h, (rect.bottom - 1) // bucket_h + 1):
+                for bucket_x in range(rect.left // bucket_w, (rect.right - 1) // bucket_w + 1):
+                    buckets.setdefault((bucket_x, bucket_y), []).append(i)
+        return rects, buckets
+
+    def get_mesh(self):
+        if self.mesh is None:
+            grid = self.get_grid()
+            if not self.grid_edited:
+                if self.base_mesh is None:
+                    self.base_mesh = self.build_mesh(grid, self.grid_origin)
+                self.mesh = self.base_mesh
+            else:
+                self.mesh = self.build_mesh(grid, self.grid_origin)
+        return self.mesh
+
+    # merged collision rects overlapping rect
+    def query_rect(self, rect):
+        if (rect.width <= 0) or (rect.height <= 0):
+            return []
+        rects, buckets = self.get_mesh()
+        bucket_w = COLLISION_BUCKET_SIZE * self.tile_size[0]
+        bucket_h = COLLISION_BUCKET_SIZE * self.tile_size[1]
+        found = set()
+        for bucket_y in range(rect.top // bucket_h, (rect.bottom - 1) // bucket_h + 1):
+            for bucket_x in range(rect.left // bucket_w, (rect.right - 1) // bucket_w + 1):
+                for i in buckets.get((bucket_x, bucket_y), []):
+                    if (i not in found) and rect.colliderect(rects[i]):
+                        found.add(i)
+        return [rects[i] for i in sorted(found)]
+
+    def invalidate(self, pos, layer):
+        chunk = (layer, pos[0] // CHUNK_SIZE, pos[1] // CHUNK_SIZE)
+        self.chunks.pop(chunk, None)
+        self.touched_chunks.add(chunk)
+
+    def tile_offset(self, tile):
+        tile_data = self.spritesheets_data.get(tile[0], {}).get(str(tile[1]) + ';' + str(tile[2]), {})
+        return tile_data.get('tile_offset', [0, 0])
+
+    # record: [world pos, tile, surface, tile_offset, flags, type id], with everything the
+    # render loop used to look up per frame resolved once. Everything but the world pos is the
+    # compiled tile shared by every position holding it; tile is the interned (type, column, row)
+    # tuple, so no record can edit the map or another record through it
+    def compile_tile(self, tile):
+        img = get_img(self.spritesheets, tile) if self.spritesheets else None
+        return [tile, img, self.tile_offset(tile), tile_flags(tile), type_id(tile[0])]
+
+    # compile_tile by tile_grid tile id, resolving each distinct tile only the first time it's seen
+    def compiled_tile(self, tile):
+        compiled = self.compiled_tiles.get(tile)
+        if compiled is None:
+            compiled = self.compile_tile(tile_table[tile])
+            self.compiled_tiles[tile] = compiled
+        return compiled
+
+    # record of tile id `tile` at tile position pos
+    def id_record(self, pos, tile):
+        compiled = self.compiled_tile(tile)
+        return [(pos[0] * self.tile_size[0], pos[1] * self.tile_size[1]), compiled[0], compiled[1], compiled[2], compiled[3], compiled[4]]
+
+    def tile_record(self, pos, tile):
+        return self.id_record(pos, tile_id(tile))
+
+    def compile_tiles(self, pos, tiles):
+        return {layer: self.tile_record(pos, tiles[layer]) for layer in tiles}
+
+    # records of the loaded level at pos, ignoring edits; fresh on every call and None where there's no tile
+    def base_records_at(self, pos):
+        if isinstance(self.base, TileGrid):
+            cell = self.base.cell(pos)
+            if cell is None:
+                return None
+            return {layer: self.id_record(pos, tile) for layer, tile in self.base.cell_ids(cell)} or None
+        tiles = self.base.get(pos)
+        if not tiles:
+            return None
+        return self.compile_tiles(pos, tiles)
+
+    # the base tiles of a chunk as x, y, layer and tile id arrays, ordered by layer, then row by
+    # row; render records are built from these and the compiled tiles when they're needed
+    def compile_chunk(self, chunk):
+        x0 = chunk[0] * CHUNK_SIZE
+        y0 = chunk[1] * CHUNK_SIZE
+        if isinstance(self.base, TileGrid):
+            xs, ys, layers, ids = self.base.tiles_in(x0, y0, x0 + CHUNK_SIZE, y0 + CHUNK_SIZE)
+        else:
+            xs, ys, layers, ids = [], [], [], []
+            for y in range(y0, y0 + CHUNK_SIZE):
+                for x in range(x0, x0 + CHUNK_SIZE):
+                    tiles = self.base.get((x, y))
+                    if tiles:
+                        for layer in tiles:
+                            xs.append(x)
+                            ys.append(y)
+                            layers.append(layer)
+                            ids.append(tile_id(tiles[layer]))
+            order = np.lexsort((xs, ys, layers)) if xs else []
+            xs, ys, layers, ids = [np.array(column)[order] for column in (xs, ys, layers, ids)]
+        return xs.astype(np.int32), ys.astype(np.int32), layers.astype(np.int32), ids.astype(np.uint16)
+
+    # edited positions keep their records until they're edited again, the rest come from the base
+    def records_at(self, pos):
+        if pos in self.overlay:
+            records = self.overlay_records.get(pos)
+            if records is None:
+                records = self.compile_tiles(pos, self.overlay[pos] or {})
+                self.overlay_records[pos] = records
+            return records
+        return self.base_records_at(pos)
+
+    # compile_chunk through the tile_chunks cache
+    def chunk_tiles(self, chunk):
+        tiles = self.tile_chunks.get(chunk)
+        if tiles is None:
+            tiles = self.compile_chunk(chunk)
+            self.tile_chunks[chunk] = tiles
+            if len(self.tile_chunks) > self.tile_chunk_limit:
+                self.tile_chunks.popitem(last=False)
+        else:
+            self.tile_chunks.move_to_end(chunk)
+        return tiles
+
+    # base positions holding a tile with any of the flags in mask, worked out once per loaded level
+    # (edits aren't included). The same set object is returned until the base changes
+    def flagged_positions(self, mask):
+        positions = self.flagged.get(mask)
+        if positions is None:
+            if isinstance(self.base, TileGrid):
+                xs, ys = self.base.positions([i for i, tile in enumerate(tile_table) if tile_flags(tile) & mask])
+                positions = set(zip(xs.tolist(), ys.tolist()))
+            else:
+                positions = set([pos for pos, tiles in self.base.items() if any(tile_flags(tile) & mask for tile in tiles.values())])
+            self.flagged[mask] = positions
+        return positions
+
+    def bake_chunk(self, layer, chunk_x, chunk_y):
+        tiles = []
+        overlay = self.overlay
+        xs, ys, layers, ids = self.chunk_tiles((chunk_x, chunk_y))
+        on_layer = layers == layer
+        for x, y, tile in zip(xs[on_layer].tolist(), ys[on_layer].tolist(), ids[on_layer].tolist()):
+            if (x, y) not in overlay:
+                compiled = self.compiled_tile(tile)
+                tiles.append(((y, x), compiled[0], compiled[1], compiled[2]))
+        if overlay:
+            for pos in overlay:
+                if (pos[0] // CHUNK_SIZE == chunk_x) and (pos[1] // CHUNK_SIZE == chunk_y):
+                    records = self.records_at(pos)
+                    if records and (layer in records):
+                        tiles.append(((pos[1], pos[0]), records[layer][1], records[layer][2], records[layer][3]))
+            tiles.sort(key=lambda tile: tile[0])
+        tiles = [(img, pygame.Rect(pos[1] * self.tile_size[0] + offset[0], pos[0] * self.tile_size[1] + offset[1], img.get_width(), img.get_height())) for pos, tile, img, offset in tiles if tile[0] not in DYNAMIC_TYPES]
+        if not tiles:
+            return None
+        # sized to the tiles themselves so images overhanging the chunk edge aren't cut off
+        bounds = tiles[0][1].unionall([rect for img, rect in tiles])
+        surf = pygame.Surface(bounds.size)
+        surf.set_colorkey((0, 0, 0))
+        surf.blits([(img, (rect.x - bounds.x, rect.y - bounds.y)) for img, rect in tiles], doreturn=False)
+        return surf, bounds.topleft
+
+    def render_layer(self, surf, scroll, layer):
+        chunk_w = CHUNK_SIZE * self.tile_size[0]
+        chunk_h = CHUNK_SIZE * self.tile_size[1]
+        blits = []
+        # one extra chunk on each side for tiles overhanging from a neighbouring chunk
+        for chunk_y in range(int(scroll[1] // chunk_h) - 1, int((scroll[1] + self.view_size[1]) // chunk_h) + 2):
+            for chunk_x in range(int(scroll[0] // chunk_w) - 1, int((scroll[0] + self.view_size[0]) // chunk_w) + 2):
+                key = (layer, chunk_x, chunk_y)
+                if key not in self.chunks:
+                    self.chunks[key] = self.bake_chunk(layer, chunk_x, chunk_y)
+                chunk = self.chunks[key]
+                if chunk:
+                    blits.append((chunk[0], (math.floor(chunk[1][0] - scroll[0]), math.floor(chunk[1][1] - scroll[1]))))
+        surf.blits(blits, doreturn=False)
+
+    # tile-space (x, y, width, height) that get_visible covers for a camera position
+    def visible_window(self, pos):
+        return (int(round(pos[0] / self.tile_size[0] - 0.5, 0)) - 1, int(round(pos[1] / self.tile_size[1] - 0.5, 0)) - 2,
+                math.ceil(self.view_size[0] / self.tile_size[0]) + 4, math.ceil(self.view_size[1] / self.tile_size[1]) + 3)
+
+    # [(layer, record)] from a position's records, filtered by mask (None keeps everything)
+    def mask_records(self, records, mask):
+        if not records:
+            return None
+        return [(layer, records[layer]) for layer in records if (mask is None) or (records[layer][4] & mask)] or None
+
+    def visible_cell(self, tile_pos, mask):
+        return self.mask_records(self.records_at(tile_pos), mask)
+
+    # full scan of the window, used on the first frame and after a camera jump; walks the
+    # compiled chunks under it instead of looking every position up
+    def scan_visible(self, window, mask):
+        cells = {}
+        x0, y0 = window[0], window[1]
+        x1, y1 = window[0] + window[2], window[1] + window[3]
+        overlay = self.overlay
+        for chunk_y in range(y0 // CHUNK_SIZE, (y1 - 1) // CHUNK_SIZE + 1):
+            for chunk_x in range(x0 // CHUNK_SIZE, (x1 - 1) // CHUNK_SIZE + 1):
+                xs, ys, layers, ids = self.chunk_tiles((chunk_x, chunk_y))
+                inside = (xs >= x0) & (xs < x1) & (ys >= y0) & (ys < y1)
+                for x, y, layer, tile in zip(xs[inside].tolist(), ys[inside].tolist(), layers[inside].tolist(), ids[inside].tolist()):
+                    if ((mask is None) or (self.compiled_tile(tile)[3] & mask)) and ((x, y) not in overlay):
+                        tile_pos = (x, y)
+                        if tile_pos not in cells:
+                            cells[tile_pos] = []
+                        cells[tile_pos].append((layer, self.id_record(tile_pos, tile)))
+        for tile_pos in overlay:
+            if (x0 <= tile_pos[0] < x1) and (y0 <= tile_pos[1] < y1):
+                cell = self.visible_cell(tile_pos, mask)
+                if cell:
+                    cells[tile_pos] = cell
+        return cells
+
+    # positions in window that aren't in old (same-sized windows)
+    def entering(self, old, window):
+        x_range = range(window[0], window[0] + window[2])
+        for y in range(window[1], window[1] + window[3]):
+            if old[1] <= y < old[1] + old[3]:
+                for x in range(window[0], min(window[0] + window[2], old[0])):
+                    yield (x, y)
+                for x in range(max(window[0], old[0] + old[2]), window[0] + window[2]):
+                    yield (x, y)
+            else:
+                for x in x_range:
+                    yield (x, y)
+
+    # positions in old that aren't in window (same-sized windows)
+    def leaving(self, old, window):
+        return self.entering(window, old)
+
+    # records in get_visible's window, per layer in all_layers order, walked row by row. The
+    # result is reused while the camera stays inside the same tile window; when it moves only the
+    # rows/columns that scroll out are dropped and the ones that scroll in are looked up and
+    # inserted in place, so the lists are updated rather than rebuilt. Treat them as read-only.
+    def get_visible_records(self, pos, mask=None):
+        window = self.visible_window(pos)
+        tracker = self.visible_trackers.get(mask)
+        if tracker and (tracker[0] == window):
+            return tracker[2]
+        if tracker and (abs(window[0] - tracker[0][0]) < window[2]) and (abs(window[1] - tracker[0][1]) < window[3]):
+            cells, output, keys = tracker[1], tracker[2], tracker[3]
+            layer_index = {l : i for i, l in enumerate(self.all_layers)}
+            for tile_pos in self.leaving(tracker[0], window):
+                cell = cells.pop(tile_pos, None)
+                if cell:
+                    key = (tile_pos[1], tile_pos[0])
+                    for layer, record in cell:
+                        i = layer_index[layer]
+                        index = bisect.bisect_left(keys[i], key)
+                        del keys[i][index]
+                        del output[i][index]
+            for tile_pos in self.entering(tracker[0], window):
+                cell = self.visible_cell(tile_pos, mask)
+                if cell:
+                    cells[tile_pos] = cell
+                    key = (tile_pos[1], tile_pos[0])
+                    for layer, record in cell:
+                        i = layer_index[layer]
+                        index = bisect.bisect_left(keys[i], key)
+                        keys[i].insert(index, key)
+                        output[i].insert(index, record)
+        else:
+            cells = self.scan_visible(window, mask)
+            layers = {l : [] for l in self.all_layers}
+            for tile_pos in sorted(cells, key=lambda tile_pos: (tile_pos[1], tile_pos[0])):
+                for layer, record in cells[tile_pos]:
+                    layers[layer].append(((tile_pos[1], tile_pos[0]), record))
+            output = [[record for key, record in layers[l]] for l in self.all_layers]
+            keys = [[key for key, record in layers[l]] for l in self.all_layers]
+        self.visible_trackers[mask] = (window, cells, output, keys)
         return output
+
+    # records start with [world pos, tile], so they index like the old [pos, tile] pairs
+    def get_visible(self, pos):
+        return self.get_visible_records(pos)
+
+def map_cache_info():
+    return {
+        'hits': map_cache_stats['hits'],
+        'misses': map_cache_stats['misses'],
+        'size': len(map_cache),
+        'max_size': MAP_CACHE_SIZE,
+    }